@@ -5,13 +5,14 @@ Protocol Buffer协议层
 """
 
 from .core.message_type import MessageType
-from .core.decorators import message, MESSAGE_REGISTRY
+from .core.decorators import message, register_raw_message, MESSAGE_REGISTRY
 from .core.base_request import BaseRequest
 from .core.base_response import BaseResponse
 
 __all__ = [
     "MessageType",
     "message", 
+    "register_raw_message",
     "MESSAGE_REGISTRY",
     "BaseRequest",
     "BaseResponse"
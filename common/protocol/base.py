@@ -8,7 +8,7 @@ Protocol base module - integration layer for tests
 from .core.base_request import BaseRequest
 from .core.base_response import BaseResponse
 from .encoding.message_pool import (
-    MessagePool, BufferPool, get_pool_stats, 
+    MessagePool, AsyncMessagePool, BufferPool, get_pool_stats, 
     create_request_batch, create_response_batch
 )
 
@@ -16,6 +16,7 @@ __all__ = [
     "BaseRequest",
     "BaseResponse", 
     "MessagePool",
+    "AsyncMessagePool",
     "BufferPool",
     "get_pool_stats",
     "create_request_batch",
@@ -2,8 +2,11 @@
 Protocol core module
 """
 from .message_type import MessageType
-from .decorators import message, MESSAGE_REGISTRY
+from .decorators import message, register_raw_message, MESSAGE_REGISTRY, RAW_MESSAGE_TYPES
 from .base_request import BaseRequest
 from .base_response import BaseResponse
 
-__all__ = ["MessageType", "message", "MESSAGE_REGISTRY", "BaseRequest", "BaseResponse"]
\ No newline at end of file
+__all__ = [
+    "MessageType", "message", "register_raw_message", "MESSAGE_REGISTRY", "RAW_MESSAGE_TYPES",
+    "BaseRequest", "BaseResponse"
+]
\ No newline at end of file
@@ -6,8 +6,15 @@
 """
 from typing import Optional, Dict, Any
 from datetime import datetime
+from .decorators import message_fields
 import uuid
 
+# 消息头字段，由from_dict单独处理
+_HEADER_FIELDS = frozenset(("sequence", "timestamp", "player_id", "metadata", "payload", "msg_id"))
+
+# 每个消息类可由from_dict批量设置的子类字段: 类声明的字段(见message_fields)去掉消息头字段
+_FIELD_CACHE: Dict[type, frozenset] = {}
+
 class BaseRequest:
     """请求消息基类"""
     
@@ -62,11 +69,13 @@ class BaseRequest:
         self.msg_id = data.get("msg_id")
         self.metadata = data.get("metadata", {})
         
-        # 设置子类字段
-        for key, value in data.items():
-            if hasattr(self, key) and key not in ["sequence", "timestamp", "player_id", "metadata", "payload", "msg_id"]:
-                setattr(self, key, value)
-                
+        # 设置子类字段，字段集合按类缓存，一次性合并到实例字典
+        cls = type(self)
+        fields = _FIELD_CACHE.get(cls)
+        if fields is None:
+            fields = _FIELD_CACHE[cls] = message_fields(cls) - _HEADER_FIELDS
+        self.__dict__.update({key: data[key] for key in data.keys() & fields})
+        
         return self
         
     async def to_bytes(self) -> bytes:
@@ -4,12 +4,25 @@
 作者: lx
 日期: 2025-06-18
 """
-from typing import Type, Dict, Any
+import ast
+import inspect
+import textwrap
+from typing import Type, Dict, Any, Set, List, Optional, ClassVar, get_origin
 from functools import wraps
 
 # 全局消息注册表
 MESSAGE_REGISTRY: Dict[int, Type] = {}
 
+# 消息类声明的实例字段，@message注册时收集，未注册的类首次查询时收集
+MESSAGE_FIELDS: Dict[Type, frozenset] = {}
+
+# 按消息号直接索引的消息类表，覆盖帧头中2字节消息类型的取值范围，供解码热路径使用
+MESSAGE_TABLE_SIZE = 1 << 16
+MESSAGE_TABLE: List[Optional[Type]] = [None] * MESSAGE_TABLE_SIZE
+
+# 透传消息类型，解码时直接返回(消息类型, 消息体)，不做反序列化
+RAW_MESSAGE_TYPES: Set[int] = set()
+
 def message(msg_type: int):
     """
     消息装饰器，用于绑定消息号
@@ -27,6 +40,9 @@ def message(msg_type: int):
         if msg_type in MESSAGE_REGISTRY:
             raise ValueError(f"Message type {msg_type} already registered")
         MESSAGE_REGISTRY[msg_type] = cls
+        if 0 <= msg_type < MESSAGE_TABLE_SIZE:
+            MESSAGE_TABLE[msg_type] = cls
+        MESSAGE_FIELDS[cls] = _collect_fields(cls)
         
         # 添加工厂方法
         @classmethod
@@ -44,6 +60,73 @@ def message(msg_type: int):
         
     return decorator
 
+def message_fields(cls: Type) -> frozenset:
+    """获取消息类声明的实例字段"""
+    fields = MESSAGE_FIELDS.get(cls)
+    if fields is None:
+        fields = MESSAGE_FIELDS[cls] = _collect_fields(cls)
+    return fields
+
+def _collect_fields(cls: Type) -> frozenset:
+    """
+    收集消息类及其基类声明的实例字段
+    
+    字段取类注解(跳过ClassVar和MESSAGE_TYPE)和__init__中对self属性的赋值，
+    只看类定义，不受某个实例上临时设置的属性影响；"_"开头的私有属性不算字段
+    """
+    fields = set()
+    for klass in cls.__mro__:
+        if klass is object:
+            continue
+        for name, annotation in vars(klass).get("__annotations__", {}).items():
+            if name == "MESSAGE_TYPE" or get_origin(annotation) is ClassVar:
+                continue
+            if isinstance(annotation, str) and annotation.startswith(("ClassVar", "typing.ClassVar")):
+                continue
+            fields.add(name)
+        init = vars(klass).get("__init__")
+        if inspect.isfunction(init):
+            fields.update(_init_assigned_fields(init))
+    return frozenset(name for name in fields if not name.startswith("_"))
+
+def _init_assigned_fields(init) -> Set[str]:
+    """__init__中赋值的self属性名，拿不到源码时返回空集合"""
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(init)))
+    except (OSError, TypeError, SyntaxError):
+        return set()
+    func = tree.body[0]
+    if not isinstance(func, (ast.FunctionDef, ast.AsyncFunctionDef)) or not func.args.args:
+        return set()
+    self_name = func.args.args[0].arg
+    
+    names = set()
+    for node in ast.walk(func):
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+            targets = [node.target]
+        else:
+            continue
+        for target in targets:
+            for item in (target.elts if isinstance(target, (ast.Tuple, ast.List)) else (target,)):
+                if (isinstance(item, ast.Attribute) and isinstance(item.value, ast.Name)
+                        and item.value.id == self_name):
+                    names.add(item.attr)
+    return names
+
+def register_raw_message(msg_type: int) -> None:
+    """
+    注册透传消息类型
+    
+    透传消息的消息体由调用方自行序列化，解码器不再经过msgpack，
+    直接返回(消息类型, 消息体)元组
+    
+    使用示例:
+    register_raw_message(MessageType.BATTLE_START_REQUEST)
+    """
+    RAW_MESSAGE_TYPES.add(msg_type)
+
 def field(required: bool = False, default: Any = None, description: str = ""):
     """
     字段装饰器，用于定义消息字段
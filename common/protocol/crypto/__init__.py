@@ -2,7 +2,9 @@
 Protocol crypto module
 """
 from .aes_cipher import AESCipher
+from .chacha_cipher import ChaCha20Cipher
 from .key_manager import KeyManager
-from .crypto_config import CryptoConfig
+from .crypto_config import CryptoConfig, has_aes_acceleration
+from .nonce import random_nonce
 
-__all__ = ["AESCipher", "KeyManager", "CryptoConfig"]
\ No newline at end of file
+__all__ = ["AESCipher", "ChaCha20Cipher", "KeyManager", "CryptoConfig", "has_aes_acceleration", "random_nonce"]
\ No newline at end of file
@@ -6,49 +6,38 @@ AES加密器
 """
 import os
 from typing import Optional
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from .nonce import random_nonce
+
+# GCM推荐96位IV，认证标签固定128位
+IV_SIZE = 12
+TAG_SIZE = 16
 
 class AESCipher:
     """AES-GCM加密器"""
     
     def __init__(self, key: Optional[bytes] = None):
         self.key = key or os.urandom(16)  # 128位密钥
-        self.backend = default_backend()
+        # AESGCM直接调用OpenSSL的AEAD实现(AES-NI/CLMUL)，密钥扩展只做一次
+        self._aead = AESGCM(self.key)
         
     def encrypt(self, plaintext: bytes) -> bytes:
         """加密数据"""
         # 生成随机IV
-        iv = os.urandom(12)  # GCM推荐96位IV
-        
-        # 创建加密器
-        cipher = Cipher(
-            algorithms.AES(self.key),
-            modes.GCM(iv),
-            backend=self.backend
-        )
-        encryptor = cipher.encryptor()
+        iv = random_nonce()  # 批量预生成，省去逐条消息的getrandom系统调用
         
-        # 加密
-        ciphertext = encryptor.update(plaintext) + encryptor.finalize()
+        # 加密，输出为 密文 + 认证标签
+        sealed = self._aead.encrypt(iv, plaintext, None)
         
         # 返回 IV + 认证标签 + 密文
-        return iv + encryptor.tag + ciphertext
+        return iv + sealed[-TAG_SIZE:] + sealed[:-TAG_SIZE]
         
     def decrypt(self, ciphertext: bytes) -> bytes:
         """解密数据"""
-        # 提取IV、认证标签和密文
-        iv = ciphertext[:12]
-        tag = ciphertext[12:28]
-        actual_ciphertext = ciphertext[28:]
-        
-        # 创建解密器
-        cipher = Cipher(
-            algorithms.AES(self.key),
-            modes.GCM(iv, tag),
-            backend=self.backend
-        )
-        decryptor = cipher.decryptor()
+        # 提取IV、认证标签和密文，支持bytes和memoryview输入
+        iv = bytes(ciphertext[:IV_SIZE])
+        tag = ciphertext[IV_SIZE:IV_SIZE + TAG_SIZE]
+        actual_ciphertext = ciphertext[IV_SIZE + TAG_SIZE:]
         
-        # 解密
-        return decryptor.update(actual_ciphertext) + decryptor.finalize()
\ No newline at end of file
+        # 解密并校验认证标签
+        return self._aead.decrypt(iv, b"".join((actual_ciphertext, tag)), None)
@@ -0,0 +1,42 @@
+"""
+ChaCha20加密器
+使用ChaCha20-Poly1305进行加密，用于没有AES硬件加速的CPU
+作者: lx
+日期: 2025-06-18
+"""
+import os
+from typing import Optional
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+from .nonce import random_nonce
+
+# 96位nonce，Poly1305认证标签固定128位
+NONCE_SIZE = 12
+TAG_SIZE = 16
+
+class ChaCha20Cipher:
+    """ChaCha20-Poly1305加密器，接口和输出格式与AESCipher一致"""
+    
+    def __init__(self, key: Optional[bytes] = None):
+        self.key = key or os.urandom(32)  # 256位密钥
+        self._aead = ChaCha20Poly1305(self.key)
+        
+    def encrypt(self, plaintext: bytes) -> bytes:
+        """加密数据"""
+        # 生成随机nonce
+        nonce = random_nonce()  # 批量预生成，省去逐条消息的getrandom系统调用
+        
+        # 加密，输出为 密文 + 认证标签
+        sealed = self._aead.encrypt(nonce, plaintext, None)
+        
+        # 返回 nonce + 认证标签 + 密文
+        return nonce + sealed[-TAG_SIZE:] + sealed[:-TAG_SIZE]
+        
+    def decrypt(self, ciphertext: bytes) -> bytes:
+        """解密数据"""
+        # 提取nonce、认证标签和密文，支持bytes和memoryview输入
+        nonce = bytes(ciphertext[:NONCE_SIZE])
+        tag = ciphertext[NONCE_SIZE:NONCE_SIZE + TAG_SIZE]
+        actual_ciphertext = ciphertext[NONCE_SIZE + TAG_SIZE:]
+        
+        # 解密并校验认证标签
+        return self._aead.decrypt(nonce, b"".join((actual_ciphertext, tag)), None)
@@ -3,8 +3,29 @@
 作者: lx
 日期: 2025-06-18
 """
+import os
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Union
+from .aes_cipher import AESCipher
+from .chacha_cipher import ChaCha20Cipher
+
+@lru_cache(maxsize=1)
+def has_aes_acceleration() -> bool:
+    """
+    检测CPU是否支持AES硬件加速
+    
+    读取/proc/cpuinfo中的aes标志(x86的flags或ARM的Features)；
+    无法读取时(非Linux)按支持处理
+    """
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    return "aes" in line.split(":", 1)[-1].split()
+    except OSError:
+        return True
+    return True
 
 @dataclass
 class CryptoConfig:
@@ -14,6 +35,7 @@ class CryptoConfig:
     key_size: int = 16
     key_rotation_interval: int = 3600  # 密钥轮换间隔(秒)
     compression_threshold: int = 128  # 压缩阈值(字节)
+    kdf_iterations: int = 100000  # PBKDF2迭代次数
     
     @classmethod
     def default(cls) -> "CryptoConfig":
@@ -29,4 +51,29 @@ class CryptoConfig:
             key_size=16,
             key_rotation_interval=1800,  # 30分钟轮换
             compression_threshold=64
-        )
\ No newline at end of file
+        )
+        
+    @classmethod
+    def for_cpu(cls) -> "CryptoConfig":
+        """
+        按当前CPU选择算法，没有AES硬件加速时使用ChaCha20-Poly1305
+        
+        帧标志位不记录加密算法，该结果只能用于部署时统一选定配置，
+        通信双方必须使用同一配置，不能在各自主机上分别检测
+        """
+        if has_aes_acceleration():
+            return cls.secure()
+        return cls(
+            enabled=True,
+            algorithm="CHACHA20-POLY1305",
+            key_size=32,
+            key_rotation_interval=1800,
+            compression_threshold=64
+        )
+        
+    def create_cipher(self, key: Optional[bytes] = None) -> Union[AESCipher, ChaCha20Cipher]:
+        """按配置的算法创建加密器，未指定密钥时按key_size随机生成"""
+        key = key or os.urandom(self.key_size)
+        if self.algorithm == "CHACHA20-POLY1305":
+            return ChaCha20Cipher(key)
+        return AESCipher(key)
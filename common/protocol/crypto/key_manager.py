@@ -3,16 +3,47 @@
 作者: lx
 日期: 2025-06-18
 """
+import hashlib
 import os
-from typing import Dict, Optional
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from .crypto_config import CryptoConfig
+
+# 每个KeyManager最多缓存的派生结果数，超出时淘汰最早的条目
+_DERIVE_CACHE_SIZE = 256
+
+# 派生缓存键: (密码的SHA256摘要, 盐值, 密钥长度, 迭代次数)，不保存明文密码
+_DeriveKey = Tuple[bytes, bytes, int, int]
 
 class KeyManager:
     """密钥管理器"""
     
-    def __init__(self):
+    def __init__(self, config: Optional[CryptoConfig] = None):
         self._keys: Dict[str, bytes] = {}
+        self._iterations = (config or CryptoConfig.default()).kdf_iterations
+        self._derived: Dict[_DeriveKey, bytes] = {}  # PBKDF2派生结果缓存，clear_cache清空
+        self._derived_lock = threading.Lock()  # derive_keys在线程池中并发读写缓存
+        
+    def _derive(self, password: bytes, salt: bytes, length: int, iterations: int) -> bytes:
+        """PBKDF2派生，相同参数直接复用结果，避免密钥轮换时重复计算"""
+        cache_key = (hashlib.sha256(password).digest(), salt, length, iterations)
+        key = self._derived.get(cache_key)
+        if key is not None:
+            return key
+            
+        # hashlib直接调用OpenSSL的PKCS5_PBKDF2_HMAC，计算期间不持锁
+        key = hashlib.pbkdf2_hmac("sha256", password, salt, iterations, length)
+        with self._derived_lock:
+            if len(self._derived) >= _DERIVE_CACHE_SIZE:
+                self._derived.pop(next(iter(self._derived)))
+            self._derived[cache_key] = key
+        return key
+        
+    def clear_cache(self):
+        """清空派生结果缓存"""
+        with self._derived_lock:
+            self._derived.clear()
         
     def generate_key(self, key_id: str, size: int = 16) -> bytes:
         """生成密钥"""
@@ -20,18 +51,44 @@ class KeyManager:
         self._keys[key_id] = key
         return key
         
-    def derive_key(self, password: bytes, salt: bytes, key_id: str, length: int = 16) -> bytes:
+    def derive_key(self, password: bytes, salt: bytes, key_id: str, length: int = 16,
+                   iterations: Optional[int] = None) -> bytes:
         """从密码派生密钥"""
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=length,
-            salt=salt,
-            iterations=100000,
-        )
-        key = kdf.derive(password)
+        key = self._derive(bytes(password), bytes(salt), length, iterations or self._iterations)
         self._keys[key_id] = key
         return key
         
+    def derive_keys(self, password: bytes, salts: Dict[str, bytes], length: int = 16,
+                    iterations: Optional[int] = None) -> Dict[str, bytes]:
+        """
+        批量从密码派生密钥
+        
+        hashlib的PBKDF2在计算期间释放GIL，多个盐值在线程池中并行派生，
+        适合启动和密钥轮换时一次性派生多把密钥
+        
+        Args:
+            password: 密码
+            salts: 密钥ID到盐值的映射
+            length: 密钥长度
+            iterations: PBKDF2迭代次数，默认取加密配置
+            
+        Returns:
+            密钥ID到派生密钥的映射
+        """
+        password = bytes(password)
+        iterations = iterations or self._iterations
+        key_ids = list(salts)
+        
+        with ThreadPoolExecutor(max_workers=min(len(key_ids), os.cpu_count() or 1) or 1) as executor:
+            keys = list(executor.map(
+                lambda key_id: self._derive(password, bytes(salts[key_id]), length, iterations),
+                key_ids
+            ))
+            
+        derived = dict(zip(key_ids, keys))
+        self._keys.update(derived)
+        return derived
+        
     def get_key(self, key_id: str) -> Optional[bytes]:
         """获取密钥"""
         return self._keys.get(key_id)
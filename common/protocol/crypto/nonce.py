@@ -0,0 +1,33 @@
+"""
+随机nonce生成
+批量从操作系统CSPRNG读取随机字节并切分为nonce，摊薄每条消息一次的getrandom系统调用
+作者: lx
+日期: 2025-06-18
+"""
+import os
+from typing import List
+
+# GCM/ChaCha20-Poly1305的nonce长度
+NONCE_SIZE = 12
+
+# 每批生成的nonce数量
+_BATCH = 256
+
+# 预生成的nonce，list.pop在GIL下是原子操作，多线程取用不会拿到同一个nonce
+_pool: List[bytes] = []
+
+def _refill() -> None:
+    """生成一批新的nonce，原地扩充，fork钩子始终清空同一个列表"""
+    buf = os.urandom(NONCE_SIZE * _BATCH)
+    _pool.extend([buf[i:i + NONCE_SIZE] for i in range(0, len(buf), NONCE_SIZE)])
+
+def random_nonce() -> bytes:
+    """取一个12字节随机nonce，和os.urandom(12)同样不可预测"""
+    while True:
+        try:
+            return _pool.pop()
+        except IndexError:
+            _refill()
+
+# fork后子进程丢弃继承来的nonce，避免父子进程用同一密钥时重用nonce
+os.register_at_fork(after_in_child=_pool.clear)
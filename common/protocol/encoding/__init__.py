@@ -4,15 +4,17 @@ Protocol encoding module
 from .encoder import MessageEncoder
 from .decoder import MessageDecoder
 from .buffer_manager import BufferManager
-from .message_pool import MessagePool, BufferPool, get_pool_stats, create_request_batch, create_response_batch
+from .message_pool import MessagePool, AsyncMessagePool, BufferPool, get_pool_stats, encode_batch_sync, create_request_batch, create_response_batch
 
 __all__ = [
     "MessageEncoder", 
     "MessageDecoder", 
     "BufferManager", 
     "MessagePool", 
+    "AsyncMessagePool",
     "BufferPool", 
     "get_pool_stats",
+    "encode_batch_sync",
     "create_request_batch",
     "create_response_batch"
 ]
\ No newline at end of file
@@ -5,81 +5,134 @@
 日期: 2025-06-18
 """
 import struct
-from typing import Optional, List, Tuple, Any
+from functools import partial
+from typing import Optional, List, Tuple, Any, Union
 import msgpack
-from ..core.decorators import MESSAGE_REGISTRY
+from ..core.decorators import MESSAGE_TABLE, RAW_MESSAGE_TYPES
+from ..crypto.aes_cipher import AESCipher
+from ..crypto.chacha_cipher import ChaCha20Cipher
+from ..crypto.crypto_config import CryptoConfig
+from .. import messages
+
+# Optional dependencies
+try:
+    import lz4.block
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+
+# 模块级msgpack解码函数
+_unpack = partial(msgpack.unpackb, raw=False)
+
+# 消息头: [4字节长度][2字节消息类型][1字节标志位]
+_HDR = struct.Struct("!IHB")
+_HDR_SIZE = _HDR.size
+_unpack_header = _HDR.unpack_from
 
 class MessageDecoder:
     """消息解码器"""
     
-    def __init__(self, buffer_size: int = 65536):
+    def __init__(self, buffer_size: int = 65536, crypto_config: Optional[CryptoConfig] = None):
+        # 消息类按需导入，解码按消息号查MESSAGE_TABLE，需要先注册全部消息类
+        messages.load_all()
         self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)  # 缓冲区重新分配时同步更新
         self._buffer_pos = 0
         self._buffer_end = 0
+        # 帧标志位不记录加密算法，须与编码端使用相同的配置，默认固定为AES-128-GCM
+        self._crypto_config = crypto_config or CryptoConfig.secure()
+        self._cipher: Optional[Union[AESCipher, ChaCha20Cipher]] = None  # 未注入时首次加解密再创建
         
     def feed(self, data: bytes):
         """添加数据到缓冲区"""
         data_len = len(data)
+        buffer = self._buffer
+        end = self._buffer_end
         
         # 确保缓冲区足够大
-        if self._buffer_end + data_len > len(self._buffer):
-            # 压缩缓冲区
-            if self._buffer_pos > 0:
-                self._buffer[:self._buffer_end - self._buffer_pos] = self._buffer[self._buffer_pos:self._buffer_end]
-                self._buffer_end -= self._buffer_pos
-                self._buffer_pos = 0
-                
-            # 扩展缓冲区
-            if self._buffer_end + data_len > len(self._buffer):
-                new_size = max(len(self._buffer) * 2, self._buffer_end + data_len)
-                new_buffer = bytearray(new_size)
-                new_buffer[:self._buffer_end] = self._buffer[:self._buffer_end]
-                self._buffer = new_buffer
-                
+        if end + data_len > len(buffer):
+            pos = self._buffer_pos
+            remaining = end - pos
+            if remaining + data_len > len(buffer):
+                # 扩展缓冲区，只拷贝未消费的数据，顺带完成压缩
+                buffer = bytearray(max(len(buffer) * 2, remaining + data_len))
+                buffer[:remaining] = self._view[pos:end]
+                self._buffer = buffer
+                self._view = memoryview(buffer)
+            else:
+                # 压缩缓冲区
+                buffer[:remaining] = buffer[pos:end]
+            self._buffer_pos = 0
+            end = remaining
+            
         # 复制数据
-        self._buffer[self._buffer_end:self._buffer_end + data_len] = data
-        self._buffer_end += data_len
+        buffer[end:end + data_len] = data
+        self._buffer_end = end + data_len
+        
+    def _next_frame(self) -> Optional[Tuple[int, int, memoryview]]:
+        """
+        切出下一帧
+        
+        只做头部解析和分帧，不涉及解密/解压/反序列化
+        
+        Returns:
+            (消息类型, 标志位, 消息体)，数据不完整时返回None；
+            消息体是内部缓冲区的memoryview切片，下一次feed前有效
+        """
+        pos = self._buffer_pos
+        available = self._buffer_end - pos
         
-    def decode(self) -> Optional[Any]:
-        """解码一个消息"""
         # 检查是否有足够的头部数据
-        if self._buffer_end - self._buffer_pos < 7:
+        if available < _HDR_SIZE:
             return None
             
         # 解析头部
-        msg_len, msg_type, flags = struct.unpack_from(
-            "!IHB", self._buffer, self._buffer_pos
-        )
+        buffer = self._buffer
+        msg_len, msg_type, flags = _unpack_header(buffer, pos)
         
         # 检查是否有完整的消息
-        total_len = 7 + msg_len
-        if self._buffer_end - self._buffer_pos < total_len:
+        total_len = _HDR_SIZE + msg_len
+        if available < total_len:
             return None
             
-        # 提取消息体
-        body_start = self._buffer_pos + 7
-        body_end = body_start + msg_len
-        body = bytes(self._buffer[body_start:body_end])
+        # 提取消息体并更新位置
+        end = pos + total_len
+        body = self._view[pos + _HDR_SIZE:end]
+        if end == self._buffer_end:
+            # 数据已全部消费，直接回到缓冲区开头，避免feed时搬移数据
+            self._buffer_pos = 0
+            self._buffer_end = 0
+        else:
+            self._buffer_pos = end
+        return msg_type, flags, body
         
-        # 更新位置
-        self._buffer_pos += total_len
+    def decode(self) -> Optional[Any]:
+        """解码一个消息"""
+        frame = self._next_frame()
+        if frame is None:
+            return None
+        msg_type, flags, body = frame
         
         # 解密
         if flags & 0x02:
-            if hasattr(self, '_cipher'):
-                body = self._cipher.decrypt(body)
-            else:
-                from ..crypto.aes_cipher import AESCipher
-                cipher = AESCipher()
-                body = cipher.decrypt(body)
+            if self._cipher is None:
+                # 首次使用时创建并缓存，避免每条消息重建密钥扩展
+                self._cipher = self._crypto_config.create_cipher()
+            body = self._cipher.decrypt(body)
             
         # 解压缩
         if flags & 0x01:
-            import lz4.frame
-            body = lz4.frame.decompress(body)
+            if not HAS_LZ4:
+                raise ImportError("lz4 is required for compressed messages")
+            body = lz4.block.decompress(body)
+            
+        # 透传消息直接返回消息体
+        if msg_type in RAW_MESSAGE_TYPES:
+            return msg_type, bytes(body)
             
         # 查找消息类
-        msg_class = MESSAGE_REGISTRY.get(msg_type)
+        # 帧头中的消息类型是无符号2字节整数，可直接索引
+        msg_class = MESSAGE_TABLE[msg_type]
         if not msg_class:
             # If not registered, create a generic BaseRequest/BaseResponse
             from ..core.base_request import BaseRequest
@@ -97,21 +150,16 @@ class MessageDecoder:
             
         # 反序列化
         if hasattr(message, "ParseFromString"):
-            # Protobuf消息
+            # Protobuf消息，ParseFromString接受任意字节缓冲区，直接解析memoryview不再拷贝
             message.ParseFromString(body)
         else:
             # msgpack消息
-            data = msgpack.unpackb(body, raw=False)
+            data = _unpack(body)
             message.from_dict(data)
             
         return message
         
     def decode_all(self) -> List[Any]:
         """解码所有可用的消息"""
-        messages = []
-        while True:
-            msg = self.decode()
-            if msg is None:
-                break
-            messages.append(msg)
-        return messages
\ No newline at end of file
+        # iter(callable, sentinel)由C层循环调用decode直到返回None，省去Python层的循环和append
+        return list(iter(self.decode, None))
\ No newline at end of file
@@ -5,19 +5,46 @@
 日期: 2025-06-18
 """
 import struct
-from typing import Optional
+from typing import List, Optional, Tuple, Union
 import msgpack
 from google.protobuf import message as protobuf_message
+from ..crypto.aes_cipher import AESCipher
+from ..crypto.chacha_cipher import ChaCha20Cipher
+from ..crypto.crypto_config import CryptoConfig
+
+# Optional dependencies
+try:
+    import lz4.block
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+
+# 模块级msgpack编码函数
+_pack = msgpack.packb
+
+# 消息头: [4字节长度][2字节消息类型][1字节标志位]
+_HDR = struct.Struct("!IHB")
+_HDR_SIZE = _HDR.size
+_pack_header = _HDR.pack_into
 
 class MessageEncoder:
     """消息编码器"""
     
-    def __init__(self, use_compression: bool = False, use_encryption: bool = False):
+    def __init__(self, use_compression: bool = False, use_encryption: bool = False,
+                 compression_threshold: Optional[int] = None, crypto_config: Optional[CryptoConfig] = None):
         self.use_compression = use_compression
         self.use_encryption = use_encryption
+        # 只压缩大于阈值的消息，默认取加密配置中的压缩阈值
+        if compression_threshold is None:
+            compression_threshold = CryptoConfig.default().compression_threshold
+        self.compression_threshold = compression_threshold
         self._buffer = bytearray(65536)  # 64KB预分配缓冲区
+        self._view = memoryview(self._buffer)  # 缓冲区重新分配时同步更新
+        # 帧标志位不记录加密算法，通信双方须使用相同的配置，默认固定为AES-128-GCM
+        self._crypto_config = crypto_config or CryptoConfig.secure()
+        self._cipher: Optional[Union[AESCipher, ChaCha20Cipher]] = None  # 未注入时首次加解密再创建
         
-    def encode(self, message) -> bytes:
+    def encode(self, message, msg_type: Optional[int] = None) -> bytes:
         """
         编码消息
         
@@ -28,55 +55,120 @@ class MessageEncoder:
         bit 0: 是否压缩
         bit 1: 是否加密
         bit 2-7: 保留
+        
+        Args:
+            message: 消息对象，或已序列化好的消息体(bytes/bytearray/memoryview)
+            msg_type: 消息类型，仅在message为已序列化的消息体时使用
+        """
+        msg_type, flags, body = self._encode_body(message, msg_type)
+        total_size = _HDR_SIZE + len(body)
+        
+        # 确保缓冲区足够大
+        if total_size > len(self._buffer):
+            self._buffer = bytearray(total_size * 2)
+            self._view = memoryview(self._buffer)
+            
+        self._write_frame(self._buffer, 0, msg_type, flags, body)
+        
+        # 返回结果，经memoryview切片只拷贝一次
+        return bytes(self._view[:total_size])
+        
+    def encode_into(self, buffer: bytearray, offset: int, message, msg_type: Optional[int] = None) -> int:
+        """
+        将消息直接编码到调用方提供的缓冲区
+        
+        Args:
+            buffer: 目标缓冲区
+            offset: 写入起始位置
+            message: 消息对象或已序列化的消息体
+            msg_type: 消息类型，仅在message为已序列化的消息体时使用
+            
+        Returns:
+            写入的字节数
+            
+        Raises:
+            ValueError: 缓冲区剩余空间不足
+        """
+        msg_type, flags, body = self._encode_body(message, msg_type)
+        total_size = _HDR_SIZE + len(body)
+        if offset + total_size > len(buffer):
+            raise ValueError(f"Buffer too small: need {total_size} bytes at offset {offset}")
+            
+        self._write_frame(buffer, offset, msg_type, flags, body)
+        return total_size
+        
+    def encode_batch(self, messages: list) -> bytes:
+        """批量编码消息，所有帧连续写入同一块缓冲区"""
+        # 先序列化全部消息体，再一次性分配输出缓冲区
+        frames = [self._encode_body(msg) for msg in messages]
+        out = bytearray(sum(_HDR_SIZE + len(body) for _, _, body in frames))
+        
+        offset = 0
+        for msg_type, flags, body in frames:
+            offset += self._write_frame(out, offset, msg_type, flags, body)
+        return bytes(out)
+        
+    def encode_batch_views(self, messages: list) -> Tuple[bytearray, List[memoryview]]:
         """
-        # 获取消息类型
-        msg_type = message.MESSAGE_TYPE
+        批量编码消息，返回连续缓冲区及其中每一帧的视图
+        
+        调用方可以一次性发送整个缓冲区，也可以按帧逐个处理，帧数据都不再额外拷贝
+        
+        Returns:
+            (包含全部帧的缓冲区, 每一帧的memoryview切片)
+        """
+        frames = [self._encode_body(msg) for msg in messages]
+        out = bytearray(sum(_HDR_SIZE + len(body) for _, _, body in frames))
+        view = memoryview(out)
+        
+        views = []
+        offset = 0
+        for msg_type, flags, body in frames:
+            end = offset + self._write_frame(out, offset, msg_type, flags, body)
+            views.append(view[offset:end])
+            offset = end
+        return out, views
         
+    def _encode_body(self, message, msg_type: Optional[int] = None) -> Tuple[int, int, bytes]:
+        """序列化、压缩、加密消息体，返回(消息类型, 标志位, 消息体)"""
         # 序列化消息体
-        if isinstance(message, protobuf_message.Message):
+        if isinstance(message, (bytes, bytearray, memoryview)):
+            # 已序列化的消息体，直接透传
+            body = message
+            msg_type = msg_type or 0
+        elif isinstance(message, protobuf_message.Message):
             # Protobuf消息
+            msg_type = message.MESSAGE_TYPE
             body = message.SerializeToString()
         else:
             # 使用msgpack序列化
-            body = msgpack.packb(message.to_dict())
+            msg_type = message.MESSAGE_TYPE
+            body = _pack(message.to_dict())
             
         # 压缩
         flags = 0
-        if self.use_compression and len(body) > 128:  # 只压缩大于128字节的消息
-            import lz4.frame
-            body = lz4.frame.compress(body)
+        if self.use_compression and len(body) > self.compression_threshold:
+            # lz4块格式没有帧头和校验和，小消息开销更低；store_size会带上4字节原始长度
+            if not HAS_LZ4:
+                raise ImportError("lz4 is required for compressed messages")
+            body = lz4.block.compress(body, mode='fast', acceleration=1)
             flags |= 0x01
             
         # 加密
         if self.use_encryption:
-            if hasattr(self, '_cipher'):
-                body = self._cipher.encrypt(body)
-            else:
-                from ..crypto.aes_cipher import AESCipher
-                cipher = AESCipher()
-                body = cipher.encrypt(body)
+            if self._cipher is None:
+                # 首次使用时创建并缓存，避免每条消息重建密钥扩展
+                self._cipher = self._crypto_config.create_cipher()
+            body = self._cipher.encrypt(body)
             flags |= 0x02
             
-        # 构建消息
-        header_size = 7  # 4 + 2 + 1
-        total_size = header_size + len(body)
+        return msg_type, flags, body
         
-        # 确保缓冲区足够大
-        if total_size > len(self._buffer):
-            self._buffer = bytearray(total_size * 2)
-        
-        # 写入头部
-        struct.pack_into("!IHB", self._buffer, 0, len(body), msg_type, flags)
-        
-        # 写入消息体
-        self._buffer[header_size:header_size + len(body)] = body
-        
-        # 返回结果
-        return bytes(self._buffer[:total_size])
-        
-    def encode_batch(self, messages: list) -> bytes:
-        """批量编码消息"""
-        results = []
-        for msg in messages:
-            results.append(self.encode(msg))
-        return b''.join(results)
\ No newline at end of file
+    @staticmethod
+    def _write_frame(buffer: bytearray, offset: int, msg_type: int, flags: int, body: bytes) -> int:
+        """写入帧头和消息体，返回写入的字节数"""
+        body_len = len(body)
+        _pack_header(buffer, offset, body_len, msg_type, flags)
+        body_start = offset + _HDR_SIZE
+        buffer[body_start:body_start + body_len] = body
+        return _HDR_SIZE + body_len
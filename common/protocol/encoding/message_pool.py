@@ -6,99 +6,197 @@
 """
 from typing import Type, TypeVar, Generic, Optional, List, Dict, Any
 from threading import Lock
+import threading
 import time
+import msgpack
 
 T = TypeVar('T')
 
 class MessagePool(Generic[T]):
-    """消息对象池"""
+    """
+    消息对象池
+    
+    每个线程优先使用自己的空闲列表，无需加锁；本地列表超出上限时
+    再加锁把一半对象转移到共享池，本地列表为空时从共享池取用。
+    created/reused按线程计数(只由本线程写)，get_stats时汇总；
+    peak_size和discarded在持锁时更新。
+    """
     
     def __init__(self, object_type: Type[T], max_size: int = 100):
         self.object_type = object_type
         self.max_size = max_size
-        self._pool: List[T] = []
+        self._pool: List[T] = []  # 共享池
         self._lock = Lock()
+        self._local = threading.local()
+        self._local_max = max(1, max_size // 4)
         self._stats = {
             "created": 0,
             "reused": 0,
-            "peak_size": 0
+            "peak_size": 0,
+            "discarded": 0
         }
+        self._thread_stats: List[Dict[str, int]] = []  # 各线程的计数
+        
+    def _local_pool(self) -> List[T]:
+        """获取当前线程的空闲列表"""
+        try:
+            return self._local.pool
+        except AttributeError:
+            pool = self._local.pool = []
+            stats = self._local.stats = {"created": 0, "reused": 0}
+            with self._lock:
+                self._thread_stats.append(stats)
+            return pool
         
     def get(self) -> T:
         """获取对象"""
-        with self._lock:
-            if self._pool:
-                obj = self._pool.pop()
-                self._stats["reused"] += 1
-                return obj
-            else:
-                obj = self.object_type()
-                self._stats["created"] += 1
-                return obj
+        pool = self._local_pool()
+        if not pool and self._pool:
+            with self._lock:
+                if self._pool:
+                    pool.append(self._pool.pop())
+                    
+        if pool:
+            self._local.stats["reused"] += 1
+            return pool.pop()
+            
+        self._local.stats["created"] += 1
+        return self.object_type()
                 
     def put(self, obj: T):
         """归还对象"""
         if not isinstance(obj, self.object_type):
             return
             
-        with self._lock:
-            if len(self._pool) < self.max_size:
-                # 重置对象状态
-                if hasattr(obj, 'clear'):
-                    obj.clear()
-                elif hasattr(obj, '__dict__'):
-                    obj.__dict__.clear()
-                    
-                self._pool.append(obj)
-                self._stats["peak_size"] = max(self._stats["peak_size"], len(self._pool))
+        # 重置对象状态
+        _reset_object(obj)
+        
+        pool = self._local_pool()
+        pool.append(obj)
+        if len(pool) > self._local_max:
+            # 本地列表过长，转移一半到共享池，共享池放不下的部分丢弃并计数
+            half = len(pool) // 2
+            with self._lock:
+                moved = min(half, max(self.max_size - len(self._pool), 0))
+                if moved:
+                    self._pool.extend(pool[-moved:])
+                    self._stats["peak_size"] = max(self._stats["peak_size"], len(self._pool))
+                self._stats["discarded"] += half - moved
+            del pool[-half:]
                 
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
+        local_size = len(self._local_pool())
         with self._lock:
             return {
-                "current_size": len(self._pool),
+                "current_size": len(self._pool) + local_size,
                 "max_size": self.max_size,
-                "objects_created": self._stats["created"],
-                "objects_reused": self._stats["reused"],
+                "objects_created": sum(stats["created"] for stats in self._thread_stats),
+                "objects_reused": sum(stats["reused"] for stats in self._thread_stats),
+                "objects_discarded": self._stats["discarded"],
                 "peak_size": self._stats["peak_size"]
             }
 
+class AsyncMessagePool(MessagePool[T]):
+    """
+    单事件循环使用的消息对象池
+    
+    只在事件循环线程内访问，不需要线程本地列表和锁
+    """
+    
+    def get(self) -> T:
+        """获取对象"""
+        if self._pool:
+            self._stats["reused"] += 1
+            return self._pool.pop()
+        self._stats["created"] += 1
+        return self.object_type()
+        
+    def put(self, obj: T):
+        """归还对象"""
+        if not isinstance(obj, self.object_type):
+            return
+        if len(self._pool) >= self.max_size:
+            self._stats["discarded"] += 1
+            return
+        _reset_object(obj)
+        self._pool.append(obj)
+        self._stats["peak_size"] = max(self._stats["peak_size"], len(self._pool))
+        
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        return {
+            "current_size": len(self._pool),
+            "max_size": self.max_size,
+            "objects_created": self._stats["created"],
+            "objects_reused": self._stats["reused"],
+            "objects_discarded": self._stats["discarded"],
+            "peak_size": self._stats["peak_size"]
+        }
+
+def _reset_object(obj: Any):
+    """重置归还对象的状态"""
+    if hasattr(obj, 'clear'):
+        obj.clear()
+    elif hasattr(obj, '__dict__'):
+        obj.__dict__.clear()
+
 class BufferPool:
-    """缓冲区池"""
+    """
+    缓冲区池
+    
+    按2的幂分桶管理空闲缓冲区，get/put都是O(1)。
+    get返回的缓冲区长度是min_size向上取整后的2的幂，可能大于min_size，
+    调用方须自行记录有效数据长度，不能用len(buffer)当作数据长度；
+    initial_size不是2的幂时向上取整，put只接收长度恰为桶大小的缓冲区
+    """
     
     def __init__(self, initial_size: int = 1024, max_size: int = 50):
-        self.initial_size = initial_size
-        self.max_size = max_size
-        self._pool: List[bytearray] = []
+        self.initial_size = 1 << (max(initial_size, 1) - 1).bit_length()  # 最小桶大小
+        self.max_size = max_size  # 每个桶最多保留的缓冲区数量
+        self._buckets: Dict[int, List[bytearray]] = {}
         self._lock = Lock()
         
     def get(self, min_size: int = 0) -> bytearray:
-        """获取缓冲区"""
+        """
+        获取缓冲区
+        
+        Args:
+            min_size: 最小长度，不足initial_size时按initial_size
+            
+        Returns:
+            长度不小于min_size的缓冲区(实际长度为桶大小，即2的幂)，内容未清零
+        """
         min_size = max(min_size, self.initial_size)
+        # 向上取整到2的幂
+        bucket_size = 1 << (min_size - 1).bit_length()
         
         with self._lock:
-            # 查找合适大小的缓冲区
-            for i, buffer in enumerate(self._pool):
-                if len(buffer) >= min_size:
-                    return self._pool.pop(i)
-                    
-            # 创建新的缓冲区
-            return bytearray(min_size)
+            bucket = self._buckets.get(bucket_size)
+            if bucket:
+                return bucket.pop()
+                
+        # 创建新的缓冲区，按桶大小分配以便归还后可复用
+        return bytearray(bucket_size)
             
     def put(self, buffer: bytearray):
-        """归还缓冲区"""
+        """归还缓冲区，长度不是桶大小(不小于initial_size的2的幂)的缓冲区直接丢弃"""
         if not isinstance(buffer, bytearray):
             return
+        bucket_size = len(buffer)
+        if bucket_size < self.initial_size or bucket_size & (bucket_size - 1):
+            return
             
         with self._lock:
-            if len(self._pool) < self.max_size:
-                # 不要清空缓冲区内容，只重置长度但保持容量
-                # 重置缓冲区但保持原有长度信息 
-                original_size = len(buffer)
-                buffer[:] = b'\x00' * original_size  # 用0填充，保持大小信息
-                self._pool.append(buffer)
-                # 按大小排序，大的在前面（这样可以优先匹配大的缓冲区）
-                self._pool.sort(key=len, reverse=True)
+            bucket = self._buckets.setdefault(bucket_size, [])
+            if len(bucket) < self.max_size:
+                # 池是私有的，复用前无需清零
+                bucket.append(buffer)
+                
+    def size(self) -> int:
+        """当前池中缓冲区总数"""
+        with self._lock:
+            return sum(len(bucket) for bucket in self._buckets.values())
 
 # 全局对象池实例
 _request_pool = MessagePool(dict, max_size=100)
@@ -118,7 +216,7 @@ def get_pool_stats() -> Dict[str, Any]:
     return {
         "request_pool": _request_pool.get_stats(),
         "response_pool": _response_pool.get_stats(),
-        "buffer_pool_size": len(_buffer_pool._pool),
+        "buffer_pool_size": _buffer_pool.size(),
         "message_stats": {
             "total_encoded": _message_stats["total_encoded"],
             "total_decoded": _message_stats["total_decoded"],
@@ -131,24 +229,55 @@ def get_pool_stats() -> Dict[str, Any]:
         }
     }
 
-async def create_request_batch(requests: List[Any]) -> List[bytes]:
-    """批量创建请求"""
+def _default_to_bytes():
+    """BaseRequest/BaseResponse自带的to_bytes实现(延迟导入避免循环依赖)"""
+    from ..core.base_request import BaseRequest
+    from ..core.base_response import BaseResponse
+    return (BaseRequest.to_bytes, BaseResponse.to_bytes)
+
+def _uses_default_to_bytes(message: Any) -> bool:
+    """消息类是否沿用基类的to_bytes(即msgpack.packb(to_dict()))"""
+    return getattr(type(message), "to_bytes", None) in _default_to_bytes()
+
+def encode_batch_sync(messages: List[Any]) -> List[bytes]:
+    """
+    批量序列化消息(同步)
+    
+    基类的to_bytes就是msgpack.packb(to_dict())，这里直接同步调用，输出一致；
+    to_bytes是协程，同步路径无法调用子类重写的版本，遇到重写了to_bytes的
+    消息抛出TypeError，此类消息请使用create_request_batch/create_response_batch。
+    整批只计时一次
+    """
+    start = time.perf_counter()
     results = []
-    for request in requests:
-        start = time.perf_counter()
-        data = await request.to_bytes()
-        _message_stats["total_encode_time"] += time.perf_counter() - start
-        _message_stats["total_encoded"] += 1
-        results.append(data)
+    for message in messages:
+        if not _uses_default_to_bytes(message):
+            raise TypeError(f"{type(message).__name__}重写了to_bytes，不能同步批量序列化")
+        results.append(msgpack.packb(message.to_dict()))
+    _message_stats["total_encode_time"] += time.perf_counter() - start
+    _message_stats["total_encoded"] += len(results)
     return results
 
+async def _encode_batch(messages: List[Any]) -> List[bytes]:
+    """批量序列化，重写了to_bytes的消息逐条await"""
+    if all(_uses_default_to_bytes(message) for message in messages):
+        return encode_batch_sync(messages)
+        
+    start = time.perf_counter()
+    results = []
+    for message in messages:
+        if _uses_default_to_bytes(message):
+            results.append(msgpack.packb(message.to_dict()))
+        else:
+            results.append(await message.to_bytes())
+    _message_stats["total_encode_time"] += time.perf_counter() - start
+    _message_stats["total_encoded"] += len(results)
+    return results
+
+async def create_request_batch(requests: List[Any]) -> List[bytes]:
+    """批量创建请求"""
+    return await _encode_batch(requests)
+
 async def create_response_batch(responses: List[Any]) -> List[bytes]:
     """批量创建响应"""
-    results = []
-    for response in responses:
-        start = time.perf_counter()
-        data = await response.to_bytes()
-        _message_stats["total_encode_time"] += time.perf_counter() - start
-        _message_stats["total_encoded"] += 1
-        results.append(data)
-    return results
\ No newline at end of file
+    return await _encode_batch(responses)
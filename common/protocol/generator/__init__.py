@@ -1,8 +1,8 @@
 """
 Protocol generator module
 """
-from .proto_gen import ProtoGenerator
+from .proto_gen import ProtoGenerator, compile_all
 from .message_scanner import MessageScanner
 from .template import ProtoTemplate
 
-__all__ = ["ProtoGenerator", "MessageScanner", "ProtoTemplate"]
\ No newline at end of file
+__all__ = ["ProtoGenerator", "MessageScanner", "ProtoTemplate", "compile_all"]
\ No newline at end of file
@@ -6,6 +6,7 @@
 from pathlib import Path
 from typing import List, Dict, Any
 from ..core.decorators import MESSAGE_REGISTRY
+from .. import messages
 
 class MessageScanner:
     """消息类扫描器"""
@@ -15,10 +16,12 @@ class MessageScanner:
         
     def scan_registered_messages(self) -> Dict[int, Any]:
         """扫描已注册的消息类"""
+        messages.load_all()
         return dict(MESSAGE_REGISTRY)
         
     def get_message_info(self, msg_type: int) -> Dict[str, Any]:
         """获取消息信息"""
+        messages.load_all()
         msg_class = MESSAGE_REGISTRY.get(msg_type)
         if not msg_class:
             return {}
@@ -42,7 +45,8 @@ class MessageScanner:
         
     def scan_all_messages(self) -> List[Dict[str, Any]]:
         """扫描所有消息"""
-        messages = []
+        messages.load_all()
+        result = []
         for msg_type, msg_class in MESSAGE_REGISTRY.items():
-            messages.append(self.get_message_info(msg_type))
-        return messages
\ No newline at end of file
+            result.append(self.get_message_info(msg_type))
+        return result
\ No newline at end of file
@@ -5,175 +5,571 @@ Proto文件生成器
 日期: 2025-06-18
 """
 import os
+import sys
 import ast
-from typing import Dict, List, Set
+import pickle
+from typing import Dict, Iterator, List, Set, Optional, Tuple
 from pathlib import Path
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from google.protobuf import descriptor_pb2
+from .template import TIMESTAMP_FORMAT
 
+# 可能包含类定义的子节点类型: 所有语句(含函数体、循环体)、except子句和match分支，
+# 与ast.walk能找到的类定义范围一致，只是不进入表达式节点
+_CONTAINER_NODES = (ast.stmt, ast.excepthandler, ast.match_case)
+
+# 消息基类名称，驻留后与解析结果比较时可直接命中同一对象
+_BASE_REQUEST = sys.intern("BaseRequest")
+_BASE_RESPONSE = sys.intern("BaseResponse")
+
+# 基类已生成的字段，子类同名字段跳过
+_RESERVED_FIELDS = frozenset(map(sys.intern, ("sequence", "timestamp", "player_id", "metadata", "code", "message", "data")))
+
+# proto包名
+_PROTO_PACKAGE = "game.protocol"
+
+# 基类字段: (proto类型, 字段名)，字段号按顺序从1开始
+_BASE_REQUEST_SPEC = (
+    ("string", "sequence"),
+    ("int64", "timestamp"),
+    ("string", "player_id"),
+    ("map<string, string>", "metadata"),
+)
+
+_BASE_RESPONSE_SPEC = (
+    ("int32", "code"),
+    ("string", "message"),
+    ("string", "sequence"),
+    ("int64", "timestamp"),
+    ("google.protobuf.Any", "data"),
+)
+
+_BASE_SPECS = {_BASE_REQUEST: _BASE_REQUEST_SPEC, _BASE_RESPONSE: _BASE_RESPONSE_SPEC}
+
+# 基类字段块，按消息基类整体追加
+_BASE_REQUEST_BLOCK = tuple("  %s %s = %d;" % (t, n, i) for i, (t, n) in enumerate(_BASE_REQUEST_SPEC, 1))
+_BASE_RESPONSE_BLOCK = tuple("  %s %s = %d;" % (t, n, i) for i, (t, n) in enumerate(_BASE_RESPONSE_SPEC, 1))
+
+# Python类型到Proto类型的映射
+_TYPE_MAPPING = {
+    "str": "string",
+    "int": "int32",
+    "float": "float",
+    "bool": "bool",
+    "bytes": "bytes",
+    "Dict[str, Any]": "map<string, string>",
+    "List[str]": "repeated string",
+    "List[int]": "repeated int32",
+    "Optional[str]": "string",
+    "Optional[int]": "int32",
+    "Optional[Dict[str, Any]]": "map<string, string>",
+}
+
+# proto标量类型到描述符字段类型的映射
+_FieldProto = descriptor_pb2.FieldDescriptorProto
+_SCALAR_TYPES = {
+    "string": _FieldProto.TYPE_STRING,
+    "int32": _FieldProto.TYPE_INT32,
+    "int64": _FieldProto.TYPE_INT64,
+    "float": _FieldProto.TYPE_FLOAT,
+    "bool": _FieldProto.TYPE_BOOL,
+    "bytes": _FieldProto.TYPE_BYTES,
+}
+
+# emit_python生成的模块，与protoc生成的_pb2模块用法一致
+_PY_MODULE_TEMPLATE = '''# -*- coding: utf-8 -*-
+# 由ProtoGenerator.emit_python生成，请勿手动修改
+# source: %(source)s
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+from google.protobuf import any_pb2 as google_dot_protobuf_dot_any__pb2
+
+_sym_db = _symbol_database.Default()
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(%(serialized)r)
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, %(module)r, _globals)
+'''
+
+# 消息装饰器名称，同时匹配@message(...)和@protocol.message(...)形式
+_MSG_DECORATOR_NAMES = frozenset({"message"})
+
+# 解析缓存版本，修改解析逻辑或消息信息结构时递增，使旧缓存条目失效
+_AST_CACHE_VERSION = 1
+
+# 解析缓存键: (缓存版本, 文件路径, mtime_ns, 文件大小)
+_CacheKey = Tuple[int, str, int, int]
+
+# 待解析文件数达到该值时才使用多进程，避免小目录承担进程池启动开销
+_PARALLEL_MIN_FILES = 16
+
+def _cache_key(file_path: str) -> _CacheKey:
+    """解析缓存键: (缓存版本, 文件路径, mtime_ns, 文件大小)"""
+    st = os.stat(file_path)
+    return _AST_CACHE_VERSION, file_path, st.st_mtime_ns, st.st_size
+
+def _iter_py_files(root: str) -> Iterator[str]:
+    """
+    遍历目录下的Python文件
+    
+    直接使用os.scandir，不为每个文件构造Path对象；与原rglob("*.py")的行为一致，
+    跳过"_"开头的文件，目录只跳过__pycache__和"."开头的隐藏目录
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as it:
+            for entry in it:
+                name = entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if name != "__pycache__" and not name.startswith("."):
+                        stack.append(entry.path)
+                elif name.endswith(".py") and not name.startswith("_"):
+                    yield entry.path
+
+def _parse_file_worker(path: str) -> Optional[Dict[str, Dict]]:
+    """
+    解析单个Python文件中的消息定义
+    
+    不依赖生成器状态，可在子进程中执行
+    
+    Returns:
+        消息名到消息信息的映射，语法错误时返回None
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+        
+    try:
+        tree = ast.parse(content)
+    except SyntaxError:
+        print(f"Parse error in {path}")
+        return None
+        
+    # 沿语句节点查找类定义，不进入表达式
+    fragment: Dict[str, Dict] = {}
+    class_def = ast.ClassDef
+    containers = _CONTAINER_NODES
+    stack = tree.body[::-1]  # 逆序入栈，保持源码顺序
+    while stack:
+        node = stack.pop()
+        # 检查是否有@message装饰器
+        if isinstance(node, class_def) and _is_message_class(node):
+            message_info = _parse_message_class(node, path)
+            fragment[message_info["name"]] = message_info
+        stack.extend(reversed([child for child in ast.iter_child_nodes(node) if isinstance(child, containers)]))
+            
+    return fragment
+
+def _is_message_class(class_node: ast.ClassDef) -> bool:
+    """类是否带有消息装饰器"""
+    for decorator in class_node.decorator_list:
+        func = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if isinstance(func, ast.Name):
+            if func.id in _MSG_DECORATOR_NAMES:
+                return True
+        elif isinstance(func, ast.Attribute):
+            if func.attr in _MSG_DECORATOR_NAMES:
+                return True
+    return False
+
+def _parse_message_class(class_node: ast.ClassDef, file_path: str) -> Dict:
+    """解析消息类"""
+    message_info = {
+        "name": class_node.name,
+        "fields": [],
+        "file": file_path,
+        "base_class": None
+    }
+    
+    # 获取基类
+    for base in class_node.bases:
+        if isinstance(base, ast.Name):
+            message_info["base_class"] = sys.intern(base.id)
+            
+    # 解析字段
+    for node in class_node.body:
+        if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            field_info = {
+                "name": sys.intern(node.target.id),
+                "type": _get_type_name(node.annotation),
+                "default": None
+            }
+            
+            value = node.value
+            if value:
+                # 字面量默认值直接取repr，只有复杂表达式才走ast.unparse
+                if isinstance(value, ast.Constant):
+                    field_info["default"] = repr(value.value)
+                else:
+                    field_info["default"] = ast.unparse(value)
+                
+            message_info["fields"].append(field_info)
+            
+    return message_info
+
+def _get_type_name(annotation) -> str:
+    """获取类型名称"""
+    if isinstance(annotation, ast.Name):
+        return annotation.id
+    elif isinstance(annotation, ast.Subscript):
+        # 处理泛型类型如 Optional[str], List[int]，单层泛型直接拼接
+        value, slice_node = annotation.value, annotation.slice
+        if isinstance(value, ast.Name):
+            if isinstance(slice_node, ast.Name):
+                return f"{value.id}[{slice_node.id}]"
+            if isinstance(slice_node, ast.Constant):
+                return f"{value.id}[{slice_node.value!r}]"
+        return ast.unparse(annotation)
+    else:
+        return "Any"
+
+def _message_fields(msg_info: Dict) -> List[Tuple[str, str, int]]:
+    """按generate_proto的规则列出消息的(proto类型, 字段名, 字段号)"""
+    base = _BASE_SPECS.get(msg_info["base_class"], ())
+    fields = [(proto_type, name, number) for number, (proto_type, name) in enumerate(base, 1)]
+    field_num = len(base) + 1
+    for field in msg_info["fields"]:
+        name = field["name"]
+        if name in _RESERVED_FIELDS:
+            continue
+        fields.append((_TYPE_MAPPING.get(field["type"], "string"), name, field_num))
+        field_num += 1
+    return fields
+
+def _add_field(message_proto: descriptor_pb2.DescriptorProto, scope: str,
+               proto_type: str, name: str, number: int):
+    """向消息描述符添加字段，map字段同时生成嵌套的Entry消息"""
+    field = message_proto.field.add(name=name, number=number)
+    if proto_type.startswith("map<"):
+        key_type, value_type = (t.strip() for t in proto_type[4:-1].split(","))
+        entry = message_proto.nested_type.add(name="".join(p.capitalize() for p in name.split("_")) + "Entry")
+        entry.options.map_entry = True
+        entry_scope = f"{scope}.{entry.name}"
+        _add_field(entry, entry_scope, key_type, "key", 1)
+        _add_field(entry, entry_scope, value_type, "value", 2)
+        field.label = _FieldProto.LABEL_REPEATED
+        field.type = _FieldProto.TYPE_MESSAGE
+        field.type_name = entry_scope
+        return
+        
+    field.label = _FieldProto.LABEL_OPTIONAL
+    if proto_type.startswith("repeated "):
+        field.label = _FieldProto.LABEL_REPEATED
+        proto_type = proto_type[len("repeated "):]
+        
+    scalar = _SCALAR_TYPES.get(proto_type)
+    if scalar is not None:
+        field.type = scalar
+    else:
+        field.type = _FieldProto.TYPE_MESSAGE
+        field.type_name = "." + proto_type
+
+class _AstCache:
+    """
+    解析结果缓存
+    
+    按(缓存版本, 文件路径, mtime_ns, 文件大小)缓存每个文件解析出的消息定义，
+    文件未变化时跳过读取和ast.parse；解析逻辑变化后递增_AST_CACHE_VERSION，
+    旧版本条目不再命中，并在flush时丢弃
+    """
+    
+    def __init__(self, cache_file: Path):
+        self.cache_file = cache_file
+        self._entries: Dict[_CacheKey, Dict[str, Dict]] = {}
+        self._used: Set[_CacheKey] = set()
+        self._dirty = False
+        self._load()
+        
+    def _load(self):
+        """加载缓存文件，文件不存在或损坏时从空缓存开始"""
+        try:
+            with open(self.cache_file, "rb") as f:
+                self._entries = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            self._entries = {}
+            
+    def get(self, key: _CacheKey) -> Optional[Dict[str, Dict]]:
+        """查找缓存"""
+        fragment = self._entries.get(key)
+        if fragment is not None:
+            self._used.add(key)
+        return fragment
+        
+    def put(self, key: _CacheKey, fragment: Dict[str, Dict]):
+        """写入缓存"""
+        self._entries[key] = fragment
+        self._used.add(key)
+        self._dirty = True
+        
+    def flush(self):
+        """原子写回缓存文件，同时丢弃本次未用到的过期条目"""
+        if not self._dirty and len(self._used) == len(self._entries):
+            return
+        entries = {key: self._entries[key] for key in self._used}
+        tmp_file = self.cache_file.with_name(self.cache_file.name + ".tmp")
+        try:
+            with open(tmp_file, "wb") as f:
+                pickle.dump(entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"Failed to write proto cache {self.cache_file}: {e}")
+            
 class ProtoGenerator:
     """Proto文件生成器"""
     
-    def __init__(self, message_dir: str, output_file: str = "game_messages.proto"):
+    def __init__(self, message_dir: str, output_file: str = "game_messages.proto", use_cache: bool = False,
+                 dev: bool = False):
         self.message_dir = Path(message_dir)
         self.output_file = output_file
+        self.use_cache = use_cache
+        self.dev = dev  # 开发模式下直接生成Python模块，不写proto文件也不调用protoc
         self.messages: Dict[str, Dict] = {}
+        self.message_files: Dict[str, str] = {}  # generate()记录的消息名到源文件的映射
+        self._cache: Optional[_AstCache] = None
         
     def scan_messages(self):
         """扫描所有消息定义"""
-        for py_file in self.message_dir.rglob("*.py"):
-            if py_file.name.startswith("_"):
-                continue
-                
-            self._parse_file(py_file)
+        # 文件按路径排序，同名消息以后出现的为准，结果与文件系统遍历顺序无关
+        for fragment in self._iter_fragments():
+            self.messages.update(fragment)
             
-    def _parse_file(self, file_path: Path):
-        """解析Python文件"""
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
+    def _iter_fragments(self) -> Iterator[Dict[str, Dict]]:
+        """按文件路径顺序逐个产出每个文件解析出的消息定义，跳过解析失败的文件"""
+        if self.use_cache:
+            self._cache = _AstCache(Path(self.output_file).parent / ".proto_gen_cache.pkl")
             
-        try:
-            tree = ast.parse(content)
-        except SyntaxError:
-            print(f"Parse error in {file_path}")
-            return
+        # 先查缓存，未命中的文件再解析
+        files: List[Tuple[str, Optional[_CacheKey], Optional[Dict[str, Dict]]]] = []
+        for py_file in sorted(_iter_py_files(str(self.message_dir))):
+            cache_key = None
+            fragment = None
+            if self._cache is not None:
+                cache_key = _cache_key(py_file)
+                fragment = self._cache.get(cache_key)
+            files.append((py_file, cache_key, fragment))
             
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                # 检查是否有@message装饰器
-                for decorator in node.decorator_list:
-                    if isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Name):
-                        if decorator.func.id == "message":
-                            self._parse_message_class(node, file_path)
-                            
-    def _parse_message_class(self, class_node: ast.ClassDef, file_path: Path):
-        """解析消息类"""
-        message_info = {
-            "name": class_node.name,
-            "fields": [],
-            "file": str(file_path),
-            "base_class": None
-        }
-        
-        # 获取基类
-        for base in class_node.bases:
-            if isinstance(base, ast.Name):
-                message_info["base_class"] = base.id
-                
-        # 解析字段
-        for node in class_node.body:
-            if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
-                field_info = {
-                    "name": node.target.id,
-                    "type": self._get_type_name(node.annotation),
-                    "default": None
-                }
+        # 解析是纯CPU操作，文件较多时分发到多进程并行；结果按提交顺序取回
+        paths = [py_file for py_file, _, fragment in files if fragment is None]
+        executor = None
+        if len(paths) >= _PARALLEL_MIN_FILES:
+            executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+            parsed = executor.map(_parse_file_worker, paths, chunksize=8)
+        else:
+            parsed = map(_parse_file_worker, paths)
+            
+        try:
+            for py_file, cache_key, fragment in files:
+                if fragment is None:
+                    fragment = next(parsed)
+                    if fragment is None:
+                        continue
+                    if cache_key is not None:
+                        self._cache.put(cache_key, fragment)
+                yield fragment
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if self._cache is not None:
+                self._cache.flush()
+                self._cache = None
                 
-                if node.value:
-                    field_info["default"] = ast.unparse(node.value)
-                    
-                message_info["fields"].append(field_info)
+    def _parse_file(self, file_path: str):
+        """解析Python文件"""
+        cache_key = None
+        if self._cache is not None:
+            cache_key = _cache_key(file_path)
+            fragment = self._cache.get(cache_key)
+            if fragment is not None:
+                self.messages.update(fragment)
+                return
                 
-        self.messages[class_node.name] = message_info
-        
-    def _get_type_name(self, annotation) -> str:
-        """获取类型名称"""
-        if isinstance(annotation, ast.Name):
-            return annotation.id
-        elif isinstance(annotation, ast.Subscript):
-            # 处理泛型类型如 Optional[str], List[int]
-            return ast.unparse(annotation)
-        else:
-            return "Any"
+        fragment = _parse_file_worker(file_path)
+        if fragment is None:
+            return
+        self.messages.update(fragment)
+        if cache_key is not None:
+            self._cache.put(cache_key, fragment)
+            
+    def generate_proto(self, ts: Optional[str] = None):
+        """
+        生成proto文件
+        
+        Args:
+            ts: 生成时间，为空时在生成开始时取一次当前时间
+        """
+        if self.dev:
+            self.emit_python()
+            return
+            
+        # 生成消息定义，按消息名排序
+        lines = self._proto_header(ts)
+        for msg_name, msg_info in sorted(self.messages.items()):
+            lines.extend(self._render_message(msg_name, msg_info))
+            
+        self._write_proto(lines)
+        
+    def generate(self, ts: Optional[str] = None):
+        """
+        扫描并生成proto文件，单遍完成
+        
+        每个文件解析出的消息立即渲染为proto文本，不保留完整的消息定义，
+        只在self.message_files中记录消息名到源文件的映射；
+        开发模式下emit_python需要完整的消息定义，退回scan_messages+emit_python
+        
+        Args:
+            ts: 生成时间，为空时在生成开始时取一次当前时间
+        """
+        if self.dev:
+            self.scan_messages()
+            self.emit_python()
+            return
             
-    def generate_proto(self):
-        """生成proto文件"""
-        lines = [
+        # 同名消息后出现的覆盖先出现的，与scan_messages一致；输出按消息名排序，与generate_proto一致
+        blocks: Dict[str, List[str]] = {}
+        message_files = self.message_files
+        render = self._render_message
+        for fragment in self._iter_fragments():
+            for msg_name, msg_info in fragment.items():
+                blocks[msg_name] = render(msg_name, msg_info)
+                message_files[msg_name] = msg_info["file"]
+                
+        lines = self._proto_header(ts)
+        for msg_name in sorted(blocks):
+            lines.extend(blocks[msg_name])
+        self._write_proto(lines)
+        
+    def _proto_header(self, ts: Optional[str] = None) -> List[str]:
+        """proto文件头"""
+        if ts is None:
+            ts = datetime.now().strftime(TIMESTAMP_FORMAT)
+        return [
             'syntax = "proto3";',
-            'package game.protocol;',
+            f'package {_PROTO_PACKAGE};',
             '',
             'import "google/protobuf/any.proto";',
             '',
             '// 自动生成的消息定义',
-            f'// 生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}',
+            f'// 生成时间: {ts}',
             '',
         ]
         
-        # 生成消息定义
-        for msg_name, msg_info in sorted(self.messages.items()):
-            lines.append(f"// {msg_info['file']}")
-            lines.append(f"message {msg_name} {{")
-            
-            # 添加基类字段
-            if msg_info["base_class"] == "BaseRequest":
-                lines.extend([
-                    "  string sequence = 1;",
-                    "  int64 timestamp = 2;",
-                    "  string player_id = 3;",
-                    "  map<string, string> metadata = 4;",
-                ])
-                field_num = 5
-            elif msg_info["base_class"] == "BaseResponse":
-                lines.extend([
-                    "  int32 code = 1;",
-                    "  string message = 2;",
-                    "  string sequence = 3;",
-                    "  int64 timestamp = 4;",
-                    "  google.protobuf.Any data = 5;",
-                ])
-                field_num = 6
-            else:
-                field_num = 1
-                
-            # 添加自定义字段
-            for field in msg_info["fields"]:
-                if field["name"] in ["sequence", "timestamp", "player_id", "metadata", 
-                                   "code", "message", "data"]:
-                    continue
-                    
-                proto_type = self._python_to_proto_type(field["type"])
-                lines.append(f"  {proto_type} {field['name']} = {field_num};")
-                field_num += 1
+    def _render_message(self, msg_name: str, msg_info: Dict) -> List[str]:
+        """渲染单个消息的proto定义"""
+        lines = [f"// {msg_info['file']}", f"message {msg_name} {{"]
+        
+        # 添加基类字段
+        base_class = msg_info["base_class"]
+        if base_class == _BASE_REQUEST:
+            lines.extend(_BASE_REQUEST_BLOCK)
+            field_num = len(_BASE_REQUEST_BLOCK) + 1
+        elif base_class == _BASE_RESPONSE:
+            lines.extend(_BASE_RESPONSE_BLOCK)
+            field_num = len(_BASE_RESPONSE_BLOCK) + 1
+        else:
+            field_num = 1
+            
+        # 添加自定义字段，循环内使用的常量和方法提前绑定到局部变量
+        append = lines.append
+        field_line = "  %s %s = %d;"
+        reserved = _RESERVED_FIELDS
+        to_proto_type = self._python_to_proto_type
+        for field in msg_info["fields"]:
+            name = field["name"]
+            if name in reserved:
+                continue
                 
-            lines.append("}")
-            lines.append("")
+            append(field_line % (to_proto_type(field["type"]), name, field_num))
+            field_num += 1
             
-        # 写入文件
+        lines.append("}")
+        lines.append("")
+        return lines
+        
+    def _write_proto(self, lines: List[str]):
+        """写入并编译proto文件"""
         with open(self.output_file, "w", encoding="utf-8") as f:
             f.write("\n".join(lines))
             
-        # 编译proto文件
         self._compile_proto()
         
-    def _python_to_proto_type(self, python_type: str) -> str:
-        """Python类型转Proto类型"""
-        type_mapping = {
-            "str": "string",
-            "int": "int32",
-            "float": "float",
-            "bool": "bool",
-            "bytes": "bytes",
-            "Dict[str, Any]": "map<string, string>",
-            "List[str]": "repeated string",
-            "List[int]": "repeated int32",
-            "Optional[str]": "string",
-            "Optional[int]": "int32",
-            "Optional[Dict[str, Any]]": "map<string, string>",
-        }
-        
-        return type_mapping.get(python_type, "string")
-        
-    def _compile_proto(self):
-        """编译proto文件"""
-        try:
-            subprocess.run([
-                "protoc",
-                f"--python_out=.",
-                f"--pyi_out=.",
-                self.output_file
-            ], check=True)
-            print(f"Successfully compiled {self.output_file}")
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to compile proto: {e}")
-        except FileNotFoundError:
-            print("protoc not found, skipping proto compilation")
\ No newline at end of file
+    def emit_python(self, module_path: Optional[str] = None) -> str:
+        """
+        直接生成Python消息模块，跳过proto文件和protoc
+        
+        在进程内按generate_proto相同的字段规则构造文件描述符，
+        生成的模块与protoc输出的_pb2模块接口一致
+        
+        Args:
+            module_path: 模块文件路径，默认与protoc输出路径相同(<proto文件名>_pb2.py)
+            
+        Returns:
+            生成的模块文件路径
+        """
+        if module_path is None:
+            output = Path(self.output_file)
+            module_path = str(output.with_name(output.stem + "_pb2.py"))
+            
+        file_proto = descriptor_pb2.FileDescriptorProto(
+            name=self.output_file,
+            package=_PROTO_PACKAGE,
+            syntax="proto3",
+            dependency=["google/protobuf/any.proto"],
+        )
+        for msg_name, msg_info in sorted(self.messages.items()):
+            message_proto = file_proto.message_type.add(name=msg_name)
+            scope = f".{_PROTO_PACKAGE}.{msg_name}"
+            for proto_type, name, number in _message_fields(msg_info):
+                _add_field(message_proto, scope, proto_type, name, number)
+                
+        with open(module_path, "w", encoding="utf-8") as f:
+            f.write(_PY_MODULE_TEMPLATE % {
+                "source": self.output_file,
+                "serialized": file_proto.SerializeToString(),
+                "module": Path(module_path).stem,
+            })
+        return module_path
+        
+    @staticmethod
+    def _python_to_proto_type(python_type: str) -> str:
+        """Python类型转Proto类型，映射表为模块级常量，未知类型按string处理"""
+        return _TYPE_MAPPING.get(python_type, "string")
+        
+    def _compile_proto(self, proto_files: Optional[List[str]] = None):
+        """编译proto文件，默认只编译本生成器的输出文件"""
+        compile_all(proto_files or [self.output_file])
+        
+def compile_all(proto_files: List[str], proto_path: Optional[str] = None, output_dir: str = ".") -> bool:
+    """
+    一次protoc调用编译多个proto文件
+    
+    生成多个proto文件时在最后统一调用，避免每个文件单独启动一次protoc
+    
+    Args:
+        proto_files: proto文件列表
+        proto_path: import搜索根目录，为空时使用protoc默认值(当前目录)
+        output_dir: 生成的Python模块输出目录
+        
+    Returns:
+        是否编译成功
+    """
+    if not proto_files:
+        return True
+        
+    cmd = ["protoc"]
+    if proto_path is not None:
+        cmd.append(f"--proto_path={proto_path}")
+    cmd.extend([f"--python_out={output_dir}", f"--pyi_out={output_dir}", *proto_files])
+    try:
+        subprocess.run(cmd, check=True)
+        print(f"Successfully compiled {', '.join(proto_files)}")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"Failed to compile proto: {e}")
+    except FileNotFoundError:
+        print("protoc not found, skipping proto compilation")
+    return False
@@ -4,43 +4,60 @@ Proto模板定义
 日期: 2025-06-18
 """
 from datetime import datetime
+from typing import Optional, Tuple
+
+# 生成时间格式
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 基础请求/响应字段，只读常量，每次调用直接返回
+_BASE_REQUEST_FIELDS: Tuple[str, ...] = (
+    "int32 sequence = 1;",
+    "int64 timestamp = 2;",
+    "string player_id = 3;",
+    "map<string, string> metadata = 4;"
+)
+
+_BASE_RESPONSE_FIELDS: Tuple[str, ...] = (
+    "int32 code = 1;",
+    "string message = 2;",
+    "int32 sequence = 3;",
+    "int64 timestamp = 4;",
+    "google.protobuf.Any data = 5;"
+)
 
 class ProtoTemplate:
     """Proto文件模板"""
     
     @staticmethod
-    def get_header(package_name: str = "game.protocol") -> str:
-        """获取proto文件头部"""
+    def get_header(package_name: str = "game.protocol", ts: Optional[str] = None) -> str:
+        """
+        获取proto文件头部
+        
+        Args:
+            package_name: proto包名
+            ts: 生成时间，由调用方在一次生成开始时计算后传入；为空时取当前时间
+        """
+        if ts is None:
+            ts = datetime.now().strftime(TIMESTAMP_FORMAT)
         return f'''syntax = "proto3";
 package {package_name};
 
 import "google/protobuf/any.proto";
 
 // 自动生成的消息定义
-// 生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+// 生成时间: {ts}
 
 '''
 
     @staticmethod
-    def get_base_request_fields() -> list:
+    def get_base_request_fields() -> Tuple[str, ...]:
         """获取基础请求字段"""
-        return [
-            "int32 sequence = 1;",
-            "int64 timestamp = 2;", 
-            "string player_id = 3;",
-            "map<string, string> metadata = 4;"
-        ]
+        return _BASE_REQUEST_FIELDS
         
     @staticmethod
-    def get_base_response_fields() -> list:
+    def get_base_response_fields() -> Tuple[str, ...]:
         """获取基础响应字段"""
-        return [
-            "int32 code = 1;",
-            "string message = 2;",
-            "int32 sequence = 3;",
-            "int64 timestamp = 4;",
-            "google.protobuf.Any data = 5;"
-        ]
+        return _BASE_RESPONSE_FIELDS
         
     @staticmethod
     def format_message(name: str, fields: list, comment: str = "") -> str:
@@ -52,4 +69,4 @@ import "google/protobuf/any.proto";
         lines.extend([f"  {field}" for field in fields])
         lines.append("}")
         lines.append("")
-        return "\n".join(lines)
\ No newline at end of file
+        return "\n".join(lines)
@@ -1,8 +1,23 @@
 """
 Protocol messages module
+
+各子包的消息类按需导入，导入本包不会注册任何消息；
+读取消息注册表的代码(MessageDecoder、MessageScanner)在使用前调用load_all完成注册
 """
 from . import auth
 from . import player
 from . import chat
 
-__all__ = ["auth", "player", "chat"]
\ No newline at end of file
+_loaded = False
+
+def load_all() -> None:
+    """导入全部消息类，完成消息注册；重复调用直接返回"""
+    global _loaded
+    if _loaded:
+        return
+    for package in (auth, player, chat):
+        for name in package.__all__:
+            getattr(package, name)
+    _loaded = True
+
+__all__ = ["auth", "player", "chat", "load_all"]
\ No newline at end of file
@@ -21,8 +21,4 @@ class LoginRequest(BaseRequest):
         
     def validate(self) -> bool:
         """验证请求有效性"""
-        if not self.username or not self.password:
-            return False
-        if not self.device_id or not self.platform:
-            return False
-        return True
\ No newline at end of file
+        return bool(self.username and self.password and self.device_id and self.platform)
\ No newline at end of file
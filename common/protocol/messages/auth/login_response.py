@@ -14,7 +14,7 @@ class LoginResponse(BaseResponse):
     
     def __init__(self):
         super().__init__()
-        self.player_id: Optional[str] = None  # 玩家ID
-        self.token: Optional[str] = None  # 会话令牌
+        self.player_id: str = ""  # 玩家ID
+        self.token: str = ""  # 会话令牌
         self.server_time: int = 0  # 服务器时间
         self.player_info: Optional[Dict[str, Any]] = None  # 玩家信息
\ No newline at end of file
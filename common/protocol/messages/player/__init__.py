@@ -1,7 +1,30 @@
 """
 Player messages module
+
+消息类在首次访问时才导入(PEP 562)，导入时由@message装饰器完成注册
 """
-from .player_info_request import PlayerInfoRequest
-from .player_info_response import PlayerInfoResponse
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+# 消息类名到所在子模块的映射
+_LAZY_MODULES = {
+    "PlayerInfoRequest": ".player_info_request",
+    "PlayerInfoResponse": ".player_info_response",
+}
+
+__all__ = list(_LAZY_MODULES)
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
 
-__all__ = ["PlayerInfoRequest", "PlayerInfoResponse"]
\ No newline at end of file
+if TYPE_CHECKING:
+    from .player_info_request import PlayerInfoRequest
+    from .player_info_response import PlayerInfoResponse
\ No newline at end of file
@@ -3,85 +3,487 @@ Proto生成器 - integration layer for tests
 作者: lx
 日期: 2025-06-18
 """
-from typing import List, Dict, Any
+import io
+import os
+import re
+import ast
+import hashlib
+import inspect
+import pickle
+import textwrap
+import typing
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from functools import lru_cache, partial
+from pathlib import Path
+from types import ModuleType
+from typing import List, Dict, Any, Iterator, Optional, TextIO
 from dataclasses import dataclass
 from datetime import datetime
+from .core.decorators import MESSAGE_REGISTRY
+from .generator.proto_gen import (
+    _BASE_SPECS, _RESERVED_FIELDS, _PARALLEL_MIN_FILES, _is_message_class, compile_all
+)
 
-@dataclass
+# Python类型到Proto类型的映射
+PYTHON_TO_PROTO: Dict[str, str] = {
+    "int": "int32",
+    "float": "float",
+    "str": "string",
+    "bool": "bool",
+    "bytes": "bytes",
+    "Dict[str, Any]": "map<string, string>",
+    "List[str]": "repeated string",
+    "List[int]": "repeated int32",
+    "List[bool]": "repeated bool",
+    "Optional[str]": "string",
+    "Optional[int]": "int32",
+    "Optional[bool]": "bool"
+}
+
+# 解析结果缓存，传入cache_dir或设置环境变量PROTO_GEN_CACHE=1时启用；
+# 解析规则变化时递增版本号，使旧缓存失效
+_CACHE_ENV = "PROTO_GEN_CACHE"
+_CACHE_VERSION = b"4"
+_DEFAULT_CACHE_DIR = ".proto_gen_cache"
+
+# 消息类源码中必然出现的标记之一，都不包含的文件直接跳过：
+# 装饰器(@message、@protocol.message)或消息基类名，与_parse_class的判定条件对应；
+# 不能只用"message"，几乎所有协议相关文件都包含这个词
+_SOURCE_MARKERS = (b"@message", b".message(", b"BaseRequest", b"BaseResponse")
+
+# 映射表未覆盖的泛型注解，一次匹配取出泛型种类和参数
+_GENERIC_RE = re.compile(r"(?P<kind>List|Optional|Union)\[(?P<inner>.*)\]$")
+
+@dataclass(frozen=True, slots=True)
 class FieldInfo:
     """字段信息"""
     name: str
     type_name: str
     field_number: int
 
-@dataclass 
+@dataclass(slots=True)
 class MessageInfo:
     """消息信息"""
     name: str
     fields: List[FieldInfo]
     comment: str = ""
 
+@lru_cache(maxsize=None)
+def _map_type(python_type: str) -> str:
+    """Python类型转Proto类型，映射是纯函数，按类型字符串缓存结果"""
+    proto_type = PYTHON_TO_PROTO.get(python_type)
+    if proto_type is not None:
+        return proto_type
+    
+    m = _GENERIC_RE.match(python_type)
+    if m is None:
+        return "string"
+    
+    kind = m["kind"]
+    inner = m["inner"]
+    if kind == "Union":
+        # 取第一个成员类型
+        inner = inner.partition(",")[0].strip()
+    inner_type = _map_type(inner)
+    if kind == "List":
+        # proto不支持嵌套repeated/map，退化为repeated string
+        if inner_type.startswith(("repeated ", "map<")):
+            return "repeated string"
+        return f"repeated {inner_type}"
+    return inner_type
+
+@lru_cache(maxsize=None)
+def _format_hint(hint: Any) -> str:
+    """运行时类型提示转为注解字符串(去掉typing.前缀)，与源码注解的写法一致"""
+    if isinstance(hint, type):
+        return hint.__name__
+    return repr(hint).replace("typing.", "")
+
 class TypeMapping:
     """类型映射"""
     
-    @staticmethod
-    def map_type(python_type: str) -> str:
-        """Python类型转Proto类型"""
-        type_mapping = {
-            "int": "int32",
-            "float": "float", 
-            "str": "string",
-            "bool": "bool",
-            "bytes": "bytes",
-            "Dict[str, Any]": "map<string, string>",
-            "List[str]": "repeated string",
-            "List[int]": "repeated int32",
-            "List[bool]": "repeated bool",
-            "Optional[str]": "string",
-            "Optional[int]": "int32",
-            "Optional[bool]": "bool"
-        }
-        return type_mapping.get(python_type, "string")
+    map_type = staticmethod(_map_type)
 
 class ProtoGenerator:
     """Proto文件生成器"""
     
     def __init__(self, package_name: str):
         self.package_name = package_name
+        self._msg_cache: Dict[tuple, str] = {}  # 消息结构 -> 渲染结果，每次写入前清空
         
     def generate_proto_content(self, messages: List[MessageInfo]) -> str:
         """生成proto文件内容"""
-        lines = [
-            'syntax = "proto3";',
-            f'package {self.package_name};',
-            '',
-            'import "google/protobuf/any.proto";',
-            '',
-            f'// 自动生成的消息定义',
-            f'// 生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}',
-            '',
-        ]
+        buf = io.StringIO()
+        self.write_proto(buf, messages)
+        return buf.getvalue()
         
+    def write_proto(self, fp: TextIO, messages: List[MessageInfo]):
+        """
+        将proto文件内容逐段写入已打开的文本文件
+        
+        不在内存中拼出完整内容，大型协议直接流式写盘
+        """
+        self._msg_cache.clear()
+        write = fp.write
+        write('syntax = "proto3";\n')
+        write(f'package {self.package_name};\n')
+        write('\n')
+        write('import "google/protobuf/any.proto";\n')
+        write('\n')
+        write('// 自动生成的消息定义\n')
+        write(f'// 生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n')
+        
+        # 消息之间以空行分隔
         for message in messages:
+            write("\n")
+            self._generate_message(message, fp)
+            
+    def _generate_message(self, message: MessageInfo, fp: TextIO, indent: int = 0):
+        """
+        将单个消息定义直接写入输出
+        
+        渲染结果按消息结构缓存，多个文件中重复出现的相同定义只格式化一次
+        """
+        key = (message.name, message.comment, tuple(message.fields), indent)
+        text = self._msg_cache.get(key)
+        if text is None:
+            prefix = "  " * indent
+            parts = []
             if message.comment:
-                lines.append(f"// {message.comment}")
-            lines.append(f"message {message.name} {{")
+                parts.append(f"{prefix}// {message.comment}\n")
+            parts.append(f"{prefix}message {message.name} {{\n")
             
+            field_prefix = prefix + "  "
             for field in message.fields:
-                lines.append(f"  {field.type_name} {field.name} = {field.field_number};")
+                parts.append(f"{field_prefix}{field.type_name} {field.name} = {field.field_number};\n")
                 
-            lines.append("}")
-            lines.append("")
+            parts.append(f"{prefix}}}\n")
+            text = self._msg_cache[key] = "".join(parts)
+        fp.write(text)
+        
+class AutoProtoGenerator:
+    """
+    自动Proto生成器
+    
+    解析消息类源码，生成proto文件并编译为Python模块
+    """
+    
+    def __init__(self, package_name: str = "game.protocol", output_dir: str = "."):
+        self.parser = PythonClassParser()
+        self.generator = ProtoGenerator(package_name)
+        self.output_dir = Path(output_dir)
+        
+    def generate_from_directory(self, directory: str, output_file: str = "game_messages.proto",
+                                compile_proto: bool = True) -> Path:
+        """
+        解析目录下的消息类并生成proto文件
+        
+        Args:
+            directory: 消息类源码目录
+            output_file: 输出的proto文件名，位于output_dir下
+            compile_proto: 是否调用protoc编译
+            
+        Returns:
+            生成的proto文件路径
+        """
+        messages = self.parser.parse_directory(directory)
+        proto_file = self.output_dir / output_file
+        proto_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(proto_file, "w", encoding="utf-8") as f:
+            self.generator.write_proto(f, messages)
             
-        return "\n".join(lines)
+        if compile_proto:
+            self.compile_many([proto_file])
+        return proto_file
+        
+    def generate_from_classes(self, modules: List[ModuleType], output_file: str = "game_messages.proto",
+                              compile_proto: bool = True) -> Path:
+        """
+        从已导入模块中的消息类生成proto文件
+        
+        按类源码解析字段，规则与generate_from_directory一致
+        
+        Args:
+            modules: 包含消息类的模块
+            output_file: 输出的proto文件名，位于output_dir下
+            compile_proto: 是否调用protoc编译
+            
+        Returns:
+            生成的proto文件路径
+        """
+        messages = []
+        seen = set()
+        for module in modules:
+            # 直接遍历模块字典，不排序也不走属性查找；
+            # 按需导入的包(PEP 562)中尚未加载的导出名再通过getattr触发导入
+            namespace = vars(module)
+            attrs = list(namespace.values())
+            attrs.extend(getattr(module, name) for name in getattr(module, "__all__", ()) if name not in namespace)
+            for attr in attrs:
+                if not isinstance(attr, type) or attr in seen:
+                    continue
+                # 只取@message注册过的消息类
+                if MESSAGE_REGISTRY.get(getattr(attr, "MESSAGE_TYPE", None)) is attr:
+                    seen.add(attr)
+                    messages.append(self._extract_message_info(attr))
+                    
+        proto_file = self.output_dir / output_file
+        proto_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(proto_file, "w", encoding="utf-8") as f:
+            self.generator.write_proto(f, messages)
+            
+        if compile_proto:
+            self.compile_many([proto_file])
+        return proto_file
+        
+    def _extract_message_info(self, cls: type) -> MessageInfo:
+        """
+        提取已导入消息类的消息信息
+        
+        取类的源码交给PythonClassParser解析，与generate_from_directory得到相同的字段
+        (含__init__中声明的字段)；取不到源码(如动态创建的类)时退回类级别的类型注解
+        """
+        try:
+            source = textwrap.dedent(inspect.getsource(cls))
+            tree = ast.parse(source)
+        except (OSError, TypeError, SyntaxError):
+            return self._extract_from_annotations(cls)
+            
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and node.name == cls.__name__:
+                message_info = self.parser._parse_class(node)
+                if message_info is not None:
+                    return message_info
+        return self._extract_from_annotations(cls)
+        
+    @staticmethod
+    def _extract_from_annotations(cls: type) -> MessageInfo:
+        """
+        按类型提示提取消息信息
+        
+        typing.get_type_hints解析字符串注解和前向引用，提示统一格式化为
+        源码注解写法(如List[int])后再映射，避免typing.前缀导致的类型退化
+        """
+        try:
+            hints = typing.get_type_hints(cls)
+        except (NameError, TypeError):
+            hints = getattr(cls, "__annotations__", {})
+            
+        base_class = next((klass.__name__ for klass in cls.__mro__ if klass.__name__ in _BASE_SPECS), None)
+        base = _BASE_SPECS.get(base_class, ())
+        fields = [FieldInfo(name, proto_type, number) for number, (proto_type, name) in enumerate(base, 1)]
+        field_num = len(base) + 1
+        for name, hint in hints.items():
+            if name in _RESERVED_FIELDS or name.startswith("_") or name.isupper():
+                continue
+            if typing.get_origin(hint) is typing.ClassVar:
+                continue
+            type_name = hint if isinstance(hint, str) else _format_hint(hint)
+            fields.append(FieldInfo(name, TypeMapping.map_type(type_name), field_num))
+            field_num += 1
+            
+        return MessageInfo(name=cls.__name__, fields=fields, comment=(cls.__doc__ or "").strip())
+        
+    def compile_many(self, proto_files: List[Path]) -> bool:
+        """
+        一次protoc调用编译多个proto文件
+        
+        以所有文件的公共父目录作为proto_path，避免每个文件单独启动一次protoc
+        """
+        if not proto_files:
+            return True
+        proto_path = os.path.commonpath([str(Path(pf).resolve().parent) for pf in proto_files])
+        files = [str(Path(pf).resolve()) for pf in proto_files]
+        return compile_all(files, proto_path=proto_path, output_dir=str(self.output_dir))
 
-class AutoProtoGenerator:
-    """自动Proto生成器"""
-    pass
+def _iter_files(root: str, pattern: str) -> Iterator[str]:
+    """
+    递归遍历目录，产出文件名匹配pattern的文件路径
+    
+    使用os.scandir的DirEntry缓存类型信息，不额外stat也不构造Path对象；
+    跳过"_"开头的文件，目录只跳过__pycache__和"."开头的隐藏目录
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            name = entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if name != "__pycache__" and not name.startswith("."):
+                    yield from _iter_files(entry.path, pattern)
+            elif not name.startswith("_") and fnmatch(name, pattern) and entry.is_file(follow_symlinks=False):
+                yield entry.path
+
+class _ClassCollector(ast.NodeVisitor):
+    """
+    按源码顺序收集类定义
+    
+    按节点类型分派，只沿语句节点下探，不进入函数体和表达式，
+    跳过了绝大部分与类定义无关的节点
+    """
+    
+    # 可能包含类定义的子节点类型
+    _CONTAINERS = (ast.stmt, ast.excepthandler, ast.match_case)
+    
+    def __init__(self):
+        self.classes: List[ast.ClassDef] = []
+        
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self.classes.append(node)
+        self.generic_visit(node)
+        
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        pass
+        
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def generic_visit(self, node: ast.AST):
+        containers = self._CONTAINERS
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, containers):
+                self.visit(child)
+                
+def _is_self_attribute(node: ast.AST) -> bool:
+    """是否为self.<name>形式的赋值目标"""
+    return isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "self"
 
 class PythonClassParser:
-    """Python类解析器"""
-    pass
+    """
+    Python类解析器
+    
+    解析源文件中的消息类(带@message装饰器或继承BaseRequest/BaseResponse)，
+    字段取类体和__init__中带类型注解的赋值，基类字段规则与generator.proto_gen一致
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.messages: List[MessageInfo] = []
+        # 按源码内容哈希缓存解析结果，默认关闭，未指定目录时由环境变量决定是否启用
+        if cache_dir is None and os.environ.get(_CACHE_ENV) == "1":
+            cache_dir = _DEFAULT_CACHE_DIR
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        
+    def parse_file(self, file_path: str) -> List[MessageInfo]:
+        """解析单个Python文件，返回本文件中的消息"""
+        parsed = self._parse_source(file_path)
+        self.messages.extend(parsed)
+        return parsed
+        
+    def _parse_source(self, file_path: str) -> List[MessageInfo]:
+        """解析单个Python文件，不修改self.messages"""
+        with open(file_path, "rb") as f:
+            data = f.read()
+            
+        # 先做字节级查找，不可能包含消息类的文件不进入哈希和ast.parse
+        if not any(marker in data for marker in _SOURCE_MARKERS):
+            return []
+            
+        cache_file = None
+        if self.cache_dir is not None:
+            digest = hashlib.blake2b(data, digest_size=16, key=_CACHE_VERSION).hexdigest()
+            cache_file = self.cache_dir / f"{digest}.pkl"
+            try:
+                with open(cache_file, "rb") as f:
+                    return pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+                pass
+                
+        try:
+            tree = ast.parse(data.decode("utf-8"))
+        except SyntaxError:
+            print(f"Parse error in {file_path}")
+            return []
+            
+        collector = _ClassCollector()
+        collector.visit(tree)
+        parsed = []
+        for node in collector.classes:
+            message_info = self._parse_class(node)
+            if message_info is not None:
+                parsed.append(message_info)
+                
+        if cache_file is not None:
+            self._write_cache(cache_file, parsed)
+        return parsed
+        
+    @staticmethod
+    def _write_cache(cache_file: Path, parsed: List[MessageInfo]):
+        """原子写入解析缓存，写入失败不影响解析结果"""
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, "wb") as f:
+                pickle.dump(parsed, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"Failed to write parse cache {cache_file}: {e}")
+        
+    def parse_directory(self, directory: str, pattern: str = "*.py") -> List[MessageInfo]:
+        """
+        递归解析目录下文件名匹配pattern的所有Python文件，结果按文件路径顺序排列
+        
+        ast.parse是纯CPU操作，文件数达到_PARALLEL_MIN_FILES时分发到多进程并行，
+        结果按提交顺序取回；文件较少时串行解析，避免进程池启动开销
+        """
+        paths = sorted(_iter_files(directory, pattern))
+        if len(paths) >= _PARALLEL_MIN_FILES:
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                results = list(executor.map(partial(_parse_one, cache_dir=self.cache_dir), paths, chunksize=8))
+        else:
+            results = [self._parse_source(path) for path in paths]
+            
+        parsed = [message_info for result in results for message_info in result]
+        self.messages.extend(parsed)
+        return parsed
+        
+    def _parse_class(self, class_node: ast.ClassDef) -> Optional[MessageInfo]:
+        """解析消息类，非消息类返回None"""
+        # 非消息类是常见情况，基类和装饰器检查都在首个命中处短路
+        base_class = next((base.id for base in class_node.bases
+                           if isinstance(base, ast.Name) and base.id in _BASE_SPECS), None)
+        if base_class is None and not _is_message_class(class_node):
+            return None
+            
+        base = _BASE_SPECS.get(base_class, ())
+        fields = [FieldInfo(name, proto_type, number) for number, (proto_type, name) in enumerate(base, 1)]
+        field_num = len(base) + 1
+        seen = set()
+        for name, annotation in self._iter_annotated_fields(class_node):
+            if name in _RESERVED_FIELDS or name in seen or name.startswith("_"):
+                continue
+            seen.add(name)
+            fields.append(FieldInfo(name, TypeMapping.map_type(self._get_type_annotation(annotation)), field_num))
+            field_num += 1
+            
+        return MessageInfo(name=class_node.name, fields=fields, comment=ast.get_docstring(class_node) or "")
+        
+    @staticmethod
+    def _iter_annotated_fields(class_node: ast.ClassDef):
+        """
+        按源码顺序产出类体和__init__中的字段: (字段名, 注解节点)
+        
+        __init__中未标注类型的self.x = <字面量>(含链式赋值)按字面量类型推断
+        """
+        for node in class_node.body:
+            if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+                yield node.target.id, node.annotation
+            elif isinstance(node, ast.FunctionDef) and node.name == "__init__":
+                for stmt in node.body:
+                    if isinstance(stmt, ast.AnnAssign):
+                        if _is_self_attribute(stmt.target):
+                            yield stmt.target.attr, stmt.annotation
+                    elif isinstance(stmt, ast.Assign) and isinstance(stmt.value, ast.Constant):
+                        annotation = ast.Name(id=type(stmt.value.value).__name__)
+                        for target in stmt.targets:
+                            if _is_self_attribute(target):
+                                yield target.attr, annotation
+                        
+    @staticmethod
+    def _get_type_annotation(annotation: ast.AST) -> str:
+        """获取类型注解字符串，ast.unparse统一处理属性访问、嵌套泛型等任意注解"""
+        return ast.unparse(annotation)
+        
+def _parse_one(file_path: str, cache_dir: Optional[Path] = None) -> List[MessageInfo]:
+    """解析单个文件，不依赖解析器状态，可在子进程中执行"""
+    return PythonClassParser(cache_dir)._parse_source(file_path)
 
 __all__ = [
     "AutoProtoGenerator",
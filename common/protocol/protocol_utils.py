@@ -4,8 +4,9 @@ Protocol utilities - integration layer for tests
 日期: 2025-06-18
 """
 import time
-from typing import List, Any, Optional, Dict
+from typing import List, Any, Optional, Dict, Tuple
 import asyncio
+from cryptography.exceptions import InvalidTag
 from .encoding.encoder import MessageEncoder
 from .encoding.decoder import MessageDecoder
 
@@ -22,23 +23,25 @@ class MessageBuffer:
     
     def __init__(self, initial_size: int = 1024):
         self.buffer = bytearray(initial_size)
+        self._view = memoryview(self.buffer)  # 缓冲区重新分配时同步更新
         self.write_pos = 0
         self.read_pos = 0
         
     def write(self, data: bytes) -> int:
         """写入数据"""
         data_len = len(data)
+        end = self.write_pos + data_len
         
-        # 确保有足够空间
-        if self.write_pos + data_len > len(self.buffer):
-            new_size = max(len(self.buffer) * 2, self.write_pos + data_len)
-            new_buffer = bytearray(new_size)
-            new_buffer[:self.write_pos] = self.buffer[:self.write_pos]
+        # 确保有足够空间，扩容时只拷贝已写入的数据
+        if end > len(self.buffer):
+            new_buffer = bytearray(max(len(self.buffer) * 2, end))
+            new_buffer[:self.write_pos] = self._view[:self.write_pos]
             self.buffer = new_buffer
+            self._view = memoryview(new_buffer)
             
-        # 写入数据
-        self.buffer[self.write_pos:self.write_pos + data_len] = data
-        self.write_pos += data_len
+        # 写入数据，bytes/bytearray/memoryview都通过缓冲区协议直接拷贝
+        self._view[self.write_pos:end] = data
+        self.write_pos = end
         return data_len
         
     def read(self, size: int) -> Optional[memoryview]:
@@ -59,11 +62,17 @@ class MessageBuffer:
         
     def compact(self):
         """压缩缓冲区"""
-        if self.read_pos > 0:
-            remaining = self.write_pos - self.read_pos
-            self.buffer[:remaining] = self.buffer[self.read_pos:self.write_pos]
-            self.write_pos = remaining
-            self.read_pos = 0
+        read_pos = self.read_pos
+        if read_pos == 0:
+            return
+        remaining = self.write_pos - read_pos
+        if remaining and read_pos < len(self.buffer) >> 2:
+            # 已读部分不到容量的1/4，搬移数据不划算，留到空洞变大再压缩
+            return
+        # 经memoryview原地搬移，不生成中间bytearray
+        self._view[:remaining] = self._view[read_pos:self.write_pos]
+        self.write_pos = remaining
+        self.read_pos = 0
             
     def remaining(self) -> int:
         """获取剩余数据长度"""
@@ -82,27 +91,26 @@ class Encryption:
         
     def encrypt(self, data: bytes, associated_data: Optional[bytes] = None) -> bytes:
         """加密数据"""
-        try:
-            # Store associated data for later validation
-            self._last_associated_data = associated_data
-            # Note: Our AES-GCM implementation doesn't use associated_data yet
-            # but we accept the parameter for API compatibility
-            return self.cipher.encrypt(data)
-        except Exception as e:
-            raise EncryptionError(f"Encryption failed: {e}")
+        # Store associated data for later validation
+        self._last_associated_data = associated_data
+        # Note: Our AES-GCM implementation doesn't use associated_data yet
+        # but we accept the parameter for API compatibility
+        # AESGCM本身由OpenSSL实现，加密失败只会是参数错误，直接抛出原始异常
+        return self.cipher.encrypt(data)
             
     def decrypt(self, data: bytes, associated_data: Optional[bytes] = None) -> bytes:
         """解密数据"""
+        # Simple validation for associated data - in real GCM this would be automatic
+        if self._last_associated_data != associated_data:
+            raise EncryptionError("Decryption failed: Associated data mismatch")
+        # Note: Our AES-GCM implementation doesn't use associated_data yet
+        # For now, we just validate that the associated_data matches if provided
+        # In a real implementation, this would be validated by the GCM algorithm
         try:
-            # Simple validation for associated data - in real GCM this would be automatic
-            if self._last_associated_data != associated_data:
-                raise EncryptionError("Associated data mismatch")
-            # Note: Our AES-GCM implementation doesn't use associated_data yet
-            # For now, we just validate that the associated_data matches if provided
-            # In a real implementation, this would be validated by the GCM algorithm
             return self.cipher.decrypt(data)
-        except Exception as e:
-            raise EncryptionError(f"Decryption failed: {e}")
+        except (InvalidTag, ValueError) as e:
+            # 认证标签校验失败或数据截断(IV长度不足)
+            raise EncryptionError(f"Decryption failed: {str(e) or 'invalid tag'}")
 
 class MessageFramer:
     """消息帧处理器"""
@@ -135,30 +143,50 @@ class ProtocolUtils:
             # Set decoder to use same key
             self.decoder._cipher = AESCipher(encryption_key)
             
-        self._stats = {
-            "messages_encoded": 0,
-            "messages_decoded": 0,
-            "bytes_encoded": 0,
-            "bytes_decoded": 0,
-            "total_encode_time": 0.0,
-            "total_decode_time": 0.0
-        }
+        # 统计计数用普通整数属性，耗时以纳秒整数累加，get_stats时再组装字典
+        self._messages_encoded = 0
+        self._messages_decoded = 0
+        self._bytes_encoded = 0
+        self._bytes_decoded = 0
+        self._encode_time_ns = 0
+        self._decode_time_ns = 0
         
     async def encode_message(self, message: Any) -> bytes:
         """编码消息"""
-        start_time = time.perf_counter()
+        start_time = time.perf_counter_ns()
         try:
             data = self.encoder.encode(message)
-            self._stats["messages_encoded"] += 1
-            self._stats["bytes_encoded"] += len(data)
-            self._stats["total_encode_time"] += time.perf_counter() - start_time
+            self._messages_encoded += 1
+            self._bytes_encoded += len(data)
+            self._encode_time_ns += time.perf_counter_ns() - start_time
             return data
         except Exception as e:
             raise ProtocolError(f"Encode failed: {e}")
             
+    async def encode_batch_contig(self, messages: List[Any]) -> Tuple[bytearray, List[memoryview]]:
+        """
+        批量编码消息到一块连续缓冲区
+        
+        Returns:
+            (包含全部帧的缓冲区, 每一帧的memoryview切片)，可对缓冲区调用一次send
+        """
+        start_time = time.perf_counter_ns()
+        try:
+            out, views = self.encoder.encode_batch_views(messages)
+        except Exception as e:
+            raise ProtocolError(f"Encode failed: {e}")
+        self._messages_encoded += len(views)
+        self._bytes_encoded += len(out)
+        self._encode_time_ns += time.perf_counter_ns() - start_time
+        return out, views
+        
     async def decode_message(self, data: bytes) -> Any:
         """解码消息"""
-        start_time = time.perf_counter()
+        return self._decode(data)
+        
+    def _decode(self, data: bytes) -> Any:
+        """同步解码一条消息，解码本身没有I/O，批量解码时无需逐条经过事件循环"""
+        start_time = time.perf_counter_ns()
         try:
             if not data:
                 raise ProtocolError("Empty data")
@@ -168,9 +196,9 @@ class ProtocolUtils:
             if message is None:
                 raise ProtocolError("Invalid message format")
                 
-            self._stats["messages_decoded"] += 1
-            self._stats["bytes_decoded"] += len(data)
-            self._stats["total_decode_time"] += time.perf_counter() - start_time
+            self._messages_decoded += 1
+            self._bytes_decoded += len(data)
+            self._decode_time_ns += time.perf_counter_ns() - start_time
             return message
         except ProtocolError:
             raise
@@ -179,32 +207,36 @@ class ProtocolUtils:
             
     async def encode_batch(self, messages: List[Any]) -> List[bytes]:
         """批量编码消息"""
-        results = []
-        for message in messages:
-            data = await self.encode_message(message)
-            results.append(data)
+        # 同步循环内连续调用编码器，复用同一个已完成密钥扩展的加密器，
+        # 省去逐条消息的协程调度；每帧仍单独加密，帧格式不变
+        start_time = time.perf_counter_ns()
+        encode = self.encoder.encode
+        try:
+            results = [encode(message) for message in messages]
+        except Exception as e:
+            raise ProtocolError(f"Encode failed: {e}")
+        self._messages_encoded += len(results)
+        self._bytes_encoded += sum(map(len, results))
+        self._encode_time_ns += time.perf_counter_ns() - start_time
         return results
         
     async def decode_batch(self, data_list: List[bytes]) -> List[Any]:
         """批量解码消息"""
-        results = []
-        for data in data_list:
-            message = await self.decode_message(data)
-            results.append(message)
-        return results
+        decode = self._decode
+        return [decode(data) for data in data_list]
         
     def get_stats(self) -> Dict[str, Any]:
         """获取统计信息"""
         return {
-            "messages_encoded": self._stats["messages_encoded"],
-            "messages_decoded": self._stats["messages_decoded"],
-            "bytes_encoded": self._stats["bytes_encoded"],
-            "bytes_decoded": self._stats["bytes_decoded"],
+            "messages_encoded": self._messages_encoded,
+            "messages_decoded": self._messages_decoded,
+            "bytes_encoded": self._bytes_encoded,
+            "bytes_decoded": self._bytes_decoded,
             "avg_encode_time_ms": (
-                self._stats["total_encode_time"] / max(self._stats["messages_encoded"], 1) * 1000
+                self._encode_time_ns / max(self._messages_encoded, 1) / 1e6
             ),
             "avg_decode_time_ms": (
-                self._stats["total_decode_time"] / max(self._stats["messages_decoded"], 1) * 1000
+                self._decode_time_ns / max(self._messages_decoded, 1) / 1e6
             ),
             "encryption_enabled": self.enable_encryption
         }
@@ -5,6 +5,7 @@
 """
 import hashlib
 import zlib
+from typing import List
 
 def crc32_checksum(data: bytes) -> int:
     """计算CRC32校验和"""
@@ -27,4 +28,29 @@ def verify_checksum(data: bytes, checksum: str, algorithm: str = "md5") -> bool:
     elif algorithm == "crc32":
         return str(crc32_checksum(data)) == checksum
     else:
-        raise ValueError(f"Unsupported algorithm: {algorithm}")
\ No newline at end of file
+        raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+def md5_many(datas: List[bytes]) -> List[str]:
+    """批量计算MD5校验和"""
+    # 一次性构造带初始数据的哈希对象即是最短路径，比复制空哈希对象再update更快
+    md5 = hashlib.md5
+    return [md5(data).hexdigest() for data in datas]
+
+def sha256_many(datas: List[bytes]) -> List[str]:
+    """批量计算SHA256校验和"""
+    sha256 = hashlib.sha256
+    return [sha256(data).hexdigest() for data in datas]
+
+def verify_checksums(datas: List[bytes], checksums: List[str], algorithm: str = "md5") -> List[bool]:
+    """批量验证校验和，算法只解析一次；数据和校验和数量不一致时抛ValueError"""
+    if len(datas) != len(checksums):
+        raise ValueError(f"Got {len(datas)} items but {len(checksums)} checksums")
+    if algorithm == "md5":
+        digests = md5_many(datas)
+    elif algorithm == "sha256":
+        digests = sha256_many(datas)
+    elif algorithm == "crc32":
+        digests = [str(crc32_checksum(data)) for data in datas]
+    else:
+        raise ValueError(f"Unsupported algorithm: {algorithm}")
+    return [digest == checksum for digest, checksum in zip(digests, checksums, strict=True)]
@@ -6,6 +6,9 @@
 import zlib
 from typing import Optional
 
+# 大数据压缩前先试压的前缀长度
+_PROBE_SIZE = 512
+
 def compress_data(data: bytes, level: int = 6) -> bytes:
     """压缩数据"""
     return zlib.compress(data, level)
@@ -20,10 +23,14 @@ def should_compress(data: bytes, threshold: int = 128) -> bool:
 
 def compress_if_beneficial(data: bytes, threshold: int = 128) -> tuple[bytes, bool]:
     """如果有益则压缩数据"""
-    if should_compress(data, threshold):
-        compressed = compress_data(data)
-        # 只有压缩率超过10%才使用压缩版本
-        if len(compressed) < len(data) * 0.9:
+    data_len = len(data)
+    if data_len > threshold:
+        # 大数据先用最快级别试压前缀，前缀都压不动(高熵或已压缩的数据)时直接放弃
+        if data_len > _PROBE_SIZE * 4 and len(zlib.compress(data[:_PROBE_SIZE], 1)) >= _PROBE_SIZE * 0.9:
+            return data, False
+        compressed = zlib.compress(data, 6)
+        # 只有压缩率超过10%才使用压缩版本，整数比较等价于 len < data_len * 0.9
+        if len(compressed) * 10 < data_len * 9:
             return compressed, True
     return data, False
 
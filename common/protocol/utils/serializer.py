@@ -3,25 +3,55 @@
 作者: lx
 日期: 2025-06-18
 """
-import msgpack
 import json
+import threading
+import msgpack
+import orjson
 from typing import Any, Dict
 
+# 非字符串键(如整数ID)与标准库行为保持一致，不抛异常
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# 每个线程复用一个msgpack.Packer及其内部缓冲区，Packer本身不是线程安全的
+_local = threading.local()
+
 def serialize_msgpack(data: Any) -> bytes:
     """使用msgpack序列化"""
-    return msgpack.packb(data)
+    try:
+        packer = _local.packer
+    except AttributeError:
+        packer = _local.packer = msgpack.Packer()
+    return packer.pack(data)
 
 def deserialize_msgpack(data: bytes) -> Any:
     """使用msgpack反序列化"""
     return msgpack.unpackb(data, raw=False)
 
 def serialize_json(data: Any) -> bytes:
-    """使用JSON序列化"""
-    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+    """
+    使用JSON序列化
+    
+    orjson直接输出UTF-8字节，省去json.dumps后的encode；与json.dumps(ensure_ascii=False)的差异:
+    - 输出紧凑，没有", "和": "中的空格，字节内容不同但解析结果相同
+    - NaN/Infinity输出为null(json.dumps输出非标准的NaN/Infinity)
+    - 超过64位的整数、orjson不支持的类型会抛TypeError，此时回退到json.dumps
+    """
+    try:
+        return orjson.dumps(data, option=_ORJSON_OPTIONS)
+    except TypeError:
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
 
 def deserialize_json(data: bytes) -> Any:
-    """使用JSON反序列化"""
-    return json.loads(data.decode('utf-8'))
+    """
+    使用JSON反序列化
+    
+    orjson直接接受bytes，无需先decode；orjson拒绝的输入(如NaN、超过64位的整数)
+    回退到json.loads，真正非法的JSON仍由json.loads抛出JSONDecodeError
+    """
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)
 
 def serialize_protobuf(message) -> bytes:
     """序列化Protobuf消息"""
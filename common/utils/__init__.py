@@ -5,8 +5,9 @@
 """
 from .serialization import auto_serialize, auto_deserialize
 from .error_handler import ErrorHandler, handle_errors, get_error_handler
-from .validators import validate_data, Validator, ValidationError
+from .validators import validate_data, validate_batch, Validator, ValidationError
 from .decorators import retry, timeout, rate_limit, cache, log_execution
+from .snowflake import SnowflakeIdGenerator, ParsedId, get_id_generator, generate_id, parse_id
 
 __all__ = [
     # 序列化
@@ -14,7 +15,9 @@ __all__ = [
     # 错误处理
     'ErrorHandler', 'handle_errors', 'get_error_handler',
     # 验证
-    'validate_data', 'Validator', 'ValidationError',
+    'validate_data', 'validate_batch', 'Validator', 'ValidationError',
     # 装饰器
-    'retry', 'timeout', 'rate_limit', 'cache', 'log_execution'
+    'retry', 'timeout', 'rate_limit', 'cache', 'log_execution',
+    # ID生成
+    'SnowflakeIdGenerator', 'ParsedId', 'get_id_generator', 'generate_id', 'parse_id'
 ]
\ No newline at end of file
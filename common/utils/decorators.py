@@ -4,11 +4,16 @@
 日期: 2025-06-20
 """
 import asyncio
+import threading
 import time
 import logging
+from collections import OrderedDict
 from typing import Any, Callable, Optional, Union
 from functools import wraps
 
+# 缓存未命中的哨兵值
+_MISS = object()
+
 def retry(
     max_attempts: int = 3,
     delay: float = 1.0,
@@ -155,46 +160,72 @@ def rate_limit(calls_per_second: float):
     
     return decorator
 
-def cache(ttl: Optional[float] = None):
+def cache(ttl: Optional[float] = None, maxsize: Optional[int] = 1024):
     """
     缓存装饰器
     
     Args:
         ttl: 缓存过期时间（秒），None表示永不过期
+        maxsize: 最多缓存的条目数，超出时淘汰最久未使用的条目，None表示不限制
     """
-    cache_storage = {}
+    # 按访问顺序排列，末尾为最近使用；值为(结果, 过期时间)
+    cache_storage: OrderedDict = OrderedDict()
+    # 查找后调整顺序与写入淘汰需要原子完成，否则其他线程淘汰该键后move_to_end抛KeyError；
+    # 被装饰函数本身在锁外执行
+    lock = threading.Lock()
+    
+    def lookup(cache_key: tuple) -> Any:
+        """查找未过期的缓存结果并标记为最近使用，未命中返回_MISS；过期条目由随后的写入覆盖"""
+        with lock:
+            cached = cache_storage.get(cache_key, _MISS)
+            if cached is _MISS:
+                return _MISS
+            cached_result, expires = cached
+            if expires is not None and time.monotonic() >= expires:
+                return _MISS
+            cache_storage.move_to_end(cache_key)
+            return cached_result
+    
+    def store(cache_key: tuple, result: Any) -> None:
+        """写入缓存并淘汰超出容量的最旧条目"""
+        expires = None if ttl is None else time.monotonic() + ttl
+        with lock:
+            cache_storage[cache_key] = (result, expires)
+            cache_storage.move_to_end(cache_key)
+            if maxsize is not None and len(cache_storage) > maxsize:
+                cache_storage.popitem(last=False)
     
     def decorator(func: Callable) -> Callable:
+        name = func.__name__
+        
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
-            # 创建缓存键
-            cache_key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            # 创建缓存键，无关键字参数时省去排序和额外的元组
+            cache_key = (name, args, frozenset(kwargs.items())) if kwargs else (name, args)
             
             # 检查缓存
-            if cache_key in cache_storage:
-                cached_result, cached_time = cache_storage[cache_key]
-                if ttl is None or time.time() - cached_time < ttl:
-                    return cached_result
+            cached_result = lookup(cache_key)
+            if cached_result is not _MISS:
+                return cached_result
             
             # 执行函数并缓存结果
             result = await func(*args, **kwargs)
-            cache_storage[cache_key] = (result, time.time())
+            store(cache_key, result)
             return result
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
-            # 创建缓存键
-            cache_key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            # 创建缓存键，无关键字参数时省去排序和额外的元组
+            cache_key = (name, args, frozenset(kwargs.items())) if kwargs else (name, args)
             
             # 检查缓存
-            if cache_key in cache_storage:
-                cached_result, cached_time = cache_storage[cache_key]
-                if ttl is None or time.time() - cached_time < ttl:
-                    return cached_result
+            cached_result = lookup(cache_key)
+            if cached_result is not _MISS:
+                return cached_result
             
             # 执行函数并缓存结果
             result = func(*args, **kwargs)
-            cache_storage[cache_key] = (result, time.time())
+            store(cache_key, result)
             return result
         
         # 检查是否是异步函数
@@ -3,8 +3,6 @@
 作者: lx
 日期: 2025-06-20
 """
-import msgpack
-import json
 from typing import Any, Dict
 
 # 导入现有的序列化方法以保持兼容性
@@ -1,14 +1,37 @@
 """
-通用工具模块
-Common Utils Module
-
+雪花算法ID生成器
 作者: lx
 日期: 2025-06-18
-描述: 包含雪花算法ID生成器等通用工具
 """
 import time
 import threading
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Final, Optional
+
+# 雪花ID各段的位移量和掩码
+_EPOCH: Final = 1420070400000  # 2015-01-01 00:00:00 GMT
+_SEQUENCE_MASK: Final = 4095  # 12位序列号的最大值
+_WORKER_ID_SHIFT: Final = 12
+_DATACENTER_ID_SHIFT: Final = 17
+_TIMESTAMP_SHIFT: Final = 22
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedId:
+    """雪花ID解析结果"""
+    timestamp: int  # 毫秒时间戳
+    datacenter_id: int
+    worker_id: int
+    sequence: int
+    
+    @property
+    def datetime(self) -> str:
+        """格式化的本地时间，只在访问时才格式化"""
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.timestamp / 1000))
+        
+    def __getitem__(self, key: str) -> Any:
+        """兼容原先按字典键读取的调用方式"""
+        return getattr(self, key)
 
 
 class SnowflakeIdGenerator:
@@ -22,6 +45,13 @@ class SnowflakeIdGenerator:
     - 12位序列号
     """
     
+    # 常量只保留为类属性以兼容外部读取，热路径直接使用模块级常量
+    epoch = _EPOCH
+    sequence_mask = _SEQUENCE_MASK
+    worker_id_shift = _WORKER_ID_SHIFT
+    datacenter_id_shift = _DATACENTER_ID_SHIFT
+    timestamp_shift = _TIMESTAMP_SHIFT
+    
     def __init__(self, datacenter_id: int = 1, worker_id: int = 1):
         """
         初始化雪花算法生成器
@@ -38,19 +68,14 @@ class SnowflakeIdGenerator:
             
         self.datacenter_id = datacenter_id
         self.worker_id = worker_id
+        # 机器ID部分对每个生成器固定，预先组合好
+        self._machine_bits = (datacenter_id << _DATACENTER_ID_SHIFT) | (worker_id << _WORKER_ID_SHIFT)
         
         # 时间戳相关
-        self.epoch = 1420070400000  # 2015-01-01 00:00:00 GMT
         self.last_timestamp = -1
         
         # 序列号相关
         self.sequence = 0
-        self.sequence_mask = 4095  # 12位序列号的最大值
-        
-        # 位移量
-        self.worker_id_shift = 12
-        self.datacenter_id_shift = 17
-        self.timestamp_shift = 22
         
         # 线程锁
         self._lock = threading.Lock()
@@ -63,7 +88,7 @@ class SnowflakeIdGenerator:
             64位唯一ID
         """
         with self._lock:
-            timestamp = self._current_timestamp()
+            timestamp = time.time_ns() // 1_000_000  # 整数毫秒，内联避免方法调用和浮点运算
             
             # 时钟回拨检测
             if timestamp < self.last_timestamp:
@@ -74,7 +99,7 @@ class SnowflakeIdGenerator:
             
             # 同一毫秒内序列号递增
             if timestamp == self.last_timestamp:
-                self.sequence = (self.sequence + 1) & self.sequence_mask
+                self.sequence = (self.sequence + 1) & _SEQUENCE_MASK
                 if self.sequence == 0:
                     # 序列号用完，等待下一毫秒
                     timestamp = self._wait_next_timestamp(self.last_timestamp)
@@ -85,9 +110,8 @@ class SnowflakeIdGenerator:
             
             # 组合各部分生成最终ID
             snowflake_id = (
-                ((timestamp - self.epoch) << self.timestamp_shift) |
-                (self.datacenter_id << self.datacenter_id_shift) |
-                (self.worker_id << self.worker_id_shift) |
+                ((timestamp - _EPOCH) << _TIMESTAMP_SHIFT) |
+                self._machine_bits |
                 self.sequence
             )
             
@@ -95,16 +119,20 @@ class SnowflakeIdGenerator:
     
     def _current_timestamp(self) -> int:
         """获取当前时间戳（毫秒）"""
-        return int(time.time() * 1000)
+        return time.time_ns() // 1_000_000
     
     def _wait_next_timestamp(self, last_timestamp: int) -> int:
         """等待下一个毫秒"""
-        timestamp = self._current_timestamp()
+        now_ns = time.time_ns()
+        timestamp = now_ns // 1_000_000
         while timestamp <= last_timestamp:
-            timestamp = self._current_timestamp()
+            # 直接睡到下一毫秒边界，释放GIL和CPU，不再空转读时钟
+            time.sleep(((last_timestamp + 1) * 1_000_000 - now_ns) / 1e9)
+            now_ns = time.time_ns()
+            timestamp = now_ns // 1_000_000
         return timestamp
     
-    def parse_id(self, snowflake_id: int) -> dict:
+    def parse_id(self, snowflake_id: int) -> ParsedId:
         """
         解析雪花算法ID
         
@@ -112,24 +140,19 @@ class SnowflakeIdGenerator:
             snowflake_id: 雪花算法生成的ID
             
         Returns:
-            包含时间戳、数据中心ID、工作机器ID、序列号的字典
+            包含时间戳、数据中心ID、工作机器ID、序列号的解析结果，格式化时间按需计算
         """
-        timestamp = ((snowflake_id >> self.timestamp_shift) + self.epoch)
-        datacenter_id = (snowflake_id >> self.datacenter_id_shift) & 31
-        worker_id = (snowflake_id >> self.worker_id_shift) & 31
-        sequence = snowflake_id & self.sequence_mask
-        
-        return {
-            'timestamp': timestamp,
-            'datetime': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp / 1000)),
-            'datacenter_id': datacenter_id,
-            'worker_id': worker_id,
-            'sequence': sequence
-        }
+        return ParsedId(
+            (snowflake_id >> _TIMESTAMP_SHIFT) + _EPOCH,
+            (snowflake_id >> _DATACENTER_ID_SHIFT) & 31,
+            (snowflake_id >> _WORKER_ID_SHIFT) & 31,
+            snowflake_id & _SEQUENCE_MASK,
+        )
 
 
 # 全局ID生成器实例
 _global_id_generator: Optional[SnowflakeIdGenerator] = None
+_global_id_generator_lock = threading.Lock()
 
 
 def get_id_generator(datacenter_id: int = 1, worker_id: int = 1) -> SnowflakeIdGenerator:
@@ -144,9 +167,14 @@ def get_id_generator(datacenter_id: int = 1, worker_id: int = 1) -> SnowflakeIdG
         雪花算法ID生成器实例
     """
     global _global_id_generator
-    if _global_id_generator is None:
-        _global_id_generator = SnowflakeIdGenerator(datacenter_id, worker_id)
-    return _global_id_generator
+    generator = _global_id_generator
+    if generator is None:
+        # 双重检查，避免并发首次调用各自创建生成器导致同一毫秒内ID重复
+        with _global_id_generator_lock:
+            generator = _global_id_generator
+            if generator is None:
+                generator = _global_id_generator = SnowflakeIdGenerator(datacenter_id, worker_id)
+    return generator
 
 
 def generate_id() -> int:
@@ -159,7 +187,7 @@ def generate_id() -> int:
     return get_id_generator().generate_id()
 
 
-def parse_id(snowflake_id: int) -> dict:
+def parse_id(snowflake_id: int) -> ParsedId:
     """
     解析雪花算法ID的便捷函数
     
@@ -167,6 +195,6 @@ def parse_id(snowflake_id: int) -> dict:
         snowflake_id: 雪花算法生成的ID
         
     Returns:
-        包含时间戳、数据中心ID、工作机器ID、序列号的字典
+        包含时间戳、数据中心ID、工作机器ID、序列号的解析结果
     """
     return get_id_generator().parse_id(snowflake_id)
\ No newline at end of file
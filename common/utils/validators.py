@@ -3,9 +3,18 @@
 作者: lx
 日期: 2025-06-20
 """
-from typing import Any, Dict, List, Optional, Union, Callable
+from typing import Any, Dict, List, Optional, Union, Callable, Pattern
+from functools import lru_cache
 import re
 
+# 固定格式的正则在导入时编译一次
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_PLAYER_ID_RE = re.compile(r'^player_\d{10,}$')
+_GAME_ID_RE = re.compile(r'^game_\d{10,}$')
+
+# 调用方传入的正则字符串按模式缓存编译结果，省去re模块内部缓存的查找
+_compile = lru_cache(maxsize=256)(re.compile)
+
 class ValidationError(Exception):
     """验证错误异常"""
     def __init__(self, field: str, message: str):
@@ -57,20 +66,20 @@ class Validator:
         if not isinstance(value, str):
             raise ValidationError(field_name, "Email must be a string")
         
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(pattern, value):
+        if not _EMAIL_RE.match(value):
             raise ValidationError(field_name, "Invalid email format")
         
         return True
     
     @staticmethod
-    def pattern_match(value: str, pattern: str, field_name: str = "field") -> bool:
-        """验证正则表达式模式"""
+    def pattern_match(value: str, pattern: Union[str, Pattern], field_name: str = "field") -> bool:
+        """验证正则表达式模式，pattern可以是字符串或已编译的正则"""
         if not isinstance(value, str):
             raise ValidationError(field_name, "Value must be a string")
         
-        if not re.match(pattern, value):
-            raise ValidationError(field_name, f"Value does not match required pattern: {pattern}")
+        regex = pattern if isinstance(pattern, re.Pattern) else _compile(pattern)
+        if not regex.match(value):
+            raise ValidationError(field_name, f"Value does not match required pattern: {regex.pattern}")
         
         return True
     
@@ -85,12 +94,12 @@ class Validator:
     @staticmethod
     def player_id_format(value: str, field_name: str = "player_id") -> bool:
         """验证玩家ID格式"""
-        return Validator.pattern_match(value, r'^player_\d{10,}$', field_name)
+        return Validator.pattern_match(value, _PLAYER_ID_RE, field_name)
     
     @staticmethod
     def game_id_format(value: str, field_name: str = "game_id") -> bool:
         """验证游戏ID格式"""
-        return Validator.pattern_match(value, r'^game_\d{10,}$', field_name)
+        return Validator.pattern_match(value, _GAME_ID_RE, field_name)
 
 def validate_data(data: Dict[str, Any], rules: Dict[str, List[Callable]]) -> Dict[str, Any]:
     """
@@ -123,6 +132,34 @@ def validate_data(data: Dict[str, Any], rules: Dict[str, List[Callable]]) -> Dic
     
     return data
 
+def validate_batch(records: List[Dict[str, Any]], rules: Dict[str, List[Callable]]) -> List[int]:
+    """
+    批量验证数据字典
+    
+    按字段逐列遍历所有记录，规则和验证函数只解析一次，不在每条记录上重复查找
+    
+    Args:
+        records: 要验证的数据字典列表
+        rules: 验证规则字典，格式同validate_data
+        
+    Returns:
+        验证失败的记录下标，升序排列
+    """
+    failed = set()
+    
+    for field_name, validators in rules.items():
+        values = [record.get(field_name) for record in records]
+        for validator in validators:
+            for index, value in enumerate(values):
+                if index in failed:
+                    continue
+                try:
+                    validator(value, field_name)
+                except ValidationError:
+                    failed.add(index)
+    
+    return sorted(failed)
+
 def create_validator(**rules) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
     """
     创建验证器函数
@@ -157,6 +194,6 @@ def validate_game_data(data: Dict[str, Any]) -> Dict[str, Any]:
     return validate_data(data, rules)
 
 __all__ = [
-    'ValidationError', 'Validator', 'validate_data', 'create_validator',
+    'ValidationError', 'Validator', 'validate_data', 'validate_batch', 'create_validator',
     'validate_player_data', 'validate_game_data'
 ]
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+消息模块预编译脚本
+以hash校验方式(PEP 552)预编译协议消息模块的pyc，加快冷启动导入
+作者: lx
+日期: 2025-06-18
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compileall
+import py_compile
+from pathlib import Path
+
+def main():
+    """主函数"""
+    project_root = Path(__file__).parent.parent
+    message_path = project_root / "common" / "protocol" / "messages"
+    
+    # checked-hash模式按源码哈希校验pyc，不依赖文件mtime，打包分发后依然有效
+    ok = compileall.compile_dir(
+        str(message_path),
+        quiet=1,
+        force=True,
+        invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH,
+    )
+    
+    if not ok:
+        print("Failed to compile message modules")
+        sys.exit(1)
+    print("Done! Compiled message modules in:", message_path)
+    
+if __name__ == "__main__":
+    main()
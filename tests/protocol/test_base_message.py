@@ -0,0 +1,45 @@
+"""
+消息基类测试
+作者: lx
+日期: 2025-06-18
+"""
+from common.protocol import BaseRequest, message
+from common.protocol.core.decorators import MESSAGE_FIELDS, MESSAGE_REGISTRY, MESSAGE_TABLE, message_fields
+from common.protocol.core import base_request
+
+class _Demo(BaseRequest):
+    """测试请求"""
+    
+    level: int = 1
+    _secret: int = 0
+    
+    def __init__(self):
+        super().__init__()
+        self.name: str = ""
+        self.x = self.y = 0
+
+def test_fields_collected_at_registration():
+    """@message注册时从类注解和__init__收集字段"""
+    demo = message(0xFFE0)(type("RegisteredDemo", (_Demo,), {}))
+    try:
+        assert demo in MESSAGE_FIELDS
+        assert message_fields(demo) - message_fields(BaseRequest) == {"level", "name", "x", "y"}
+    finally:
+        MESSAGE_REGISTRY.pop(0xFFE0, None)
+        MESSAGE_TABLE[0xFFE0] = None
+        MESSAGE_FIELDS.pop(demo, None)
+
+def test_from_dict_ignores_instance_attributes():
+    """首个解码实例上临时设置的属性不会进入整个类的字段集合"""
+    base_request._FIELD_CACHE.pop(_Demo, None)
+    first = _Demo()
+    first.MESSAGE_TYPE = 1
+    first.extra = "x"
+    first.from_dict({"name": "a", "MESSAGE_TYPE": 99, "extra": "y", "unknown": 1})
+    
+    assert first.name == "a"
+    assert first.extra == "x"
+    assert first.MESSAGE_TYPE == 1
+    second = _Demo().from_dict({"name": "b", "level": 3, "x": 1, "extra": "y"})
+    assert (second.name, second.level, second.x) == ("b", 3, 1)
+    assert not hasattr(second, "extra")
@@ -0,0 +1,49 @@
+"""
+校验和工具测试
+作者: lx
+日期: 2025-06-18
+"""
+import hashlib
+import zlib
+
+import pytest
+
+from common.protocol.utils.checksum import (
+    crc32_checksum, md5_many, sha256_many, verify_checksum, verify_checksums
+)
+
+DATAS = [b"", b"knight", bytes(range(256)) * 64]
+
+def test_many_matches_hashlib():
+    """批量计算与hashlib逐条计算一致"""
+    assert md5_many(DATAS) == [hashlib.md5(d).hexdigest() for d in DATAS]
+    assert sha256_many(DATAS) == [hashlib.sha256(d).hexdigest() for d in DATAS]
+
+def test_crc32_matches_zlib():
+    """CRC32与zlib结果一致(IEEE多项式)"""
+    for data in DATAS:
+        assert crc32_checksum(data) == zlib.crc32(data) & 0xffffffff
+
+@pytest.mark.parametrize("algorithm", ["md5", "sha256", "crc32"])
+def test_verify_checksums(algorithm):
+    """批量验证与逐条验证一致，篡改的数据校验失败"""
+    if algorithm == "crc32":
+        checksums = [str(crc32_checksum(d)) for d in DATAS]
+    else:
+        checksums = [getattr(hashlib, algorithm)(d).hexdigest() for d in DATAS]
+    tampered = DATAS[:2] + [DATAS[2][:-1] + b"\x00"]
+    
+    assert verify_checksums(DATAS, checksums, algorithm) == [True, True, True]
+    assert verify_checksums(tampered, checksums, algorithm) == [True, True, False]
+    assert [verify_checksum(d, c, algorithm) for d, c in zip(tampered, checksums)] == [True, True, False]
+
+def test_verify_checksums_unknown_algorithm():
+    """不支持的算法抛ValueError"""
+    with pytest.raises(ValueError):
+        verify_checksums(DATAS, md5_many(DATAS), "sha1")
+
+@pytest.mark.parametrize("checksums", [[], md5_many(DATAS[:2]), md5_many(DATAS) + [""]])
+def test_verify_checksums_length_mismatch(checksums):
+    """校验和缺失或多余时抛ValueError，不能当作全部通过"""
+    with pytest.raises(ValueError):
+        verify_checksums(DATAS, checksums, "md5")
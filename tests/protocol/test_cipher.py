@@ -0,0 +1,65 @@
+"""
+加密器测试
+作者: lx
+日期: 2025-06-18
+"""
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+
+from common.protocol.crypto.aes_cipher import AESCipher, IV_SIZE, TAG_SIZE
+from common.protocol.crypto.chacha_cipher import ChaCha20Cipher
+from common.protocol.crypto.crypto_config import CryptoConfig
+
+def test_aes_wire_layout():
+    """输出格式为 IV(12) + 认证标签(16) + 密文，可由标准AES-GCM解开"""
+    key = os.urandom(16)
+    plaintext = b"knight hero" * 10
+    sealed = AESCipher(key).encrypt(plaintext)
+    
+    assert len(sealed) == IV_SIZE + TAG_SIZE + len(plaintext)
+    iv, tag, ciphertext = sealed[:IV_SIZE], sealed[IV_SIZE:IV_SIZE + TAG_SIZE], sealed[IV_SIZE + TAG_SIZE:]
+    assert AESGCM(key).decrypt(iv, ciphertext + tag, None) == plaintext
+
+def test_aes_round_trip_memoryview():
+    """解密接受memoryview输入，每次加密使用不同的IV"""
+    cipher = AESCipher()
+    first = cipher.encrypt(b"payload")
+    second = cipher.encrypt(b"payload")
+    
+    assert first[:IV_SIZE] != second[:IV_SIZE]
+    assert cipher.decrypt(memoryview(first)) == b"payload"
+
+def test_aes_tampered():
+    """篡改密文或使用错误密钥时认证失败"""
+    cipher = AESCipher()
+    sealed = bytearray(cipher.encrypt(b"payload"))
+    
+    with pytest.raises(InvalidTag):
+        AESCipher().decrypt(bytes(sealed))
+    sealed[-1] ^= 1
+    with pytest.raises(InvalidTag):
+        cipher.decrypt(bytes(sealed))
+
+def test_chacha_wire_layout():
+    """ChaCha20-Poly1305输出格式与AESCipher相同"""
+    key = os.urandom(32)
+    sealed = ChaCha20Cipher(key).encrypt(b"payload")
+    
+    nonce, tag, ciphertext = sealed[:IV_SIZE], sealed[IV_SIZE:IV_SIZE + TAG_SIZE], sealed[IV_SIZE + TAG_SIZE:]
+    assert ChaCha20Poly1305(key).decrypt(nonce, ciphertext + tag, None) == b"payload"
+    assert ChaCha20Cipher(key).decrypt(memoryview(sealed)) == b"payload"
+
+@pytest.mark.parametrize("config, cipher_type", [
+    (CryptoConfig.secure(), AESCipher),
+    (CryptoConfig(algorithm="CHACHA20-POLY1305", key_size=32), ChaCha20Cipher),
+])
+def test_create_cipher(config, cipher_type):
+    """按配置的算法和密钥长度创建加密器"""
+    cipher = config.create_cipher()
+    
+    assert isinstance(cipher, cipher_type)
+    assert len(cipher.key) == config.key_size
+    assert cipher.decrypt(cipher.encrypt(b"x")) == b"x"
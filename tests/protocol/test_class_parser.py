@@ -0,0 +1,147 @@
+"""
+PythonClassParser测试
+作者: lx
+日期: 2025-06-18
+"""
+import textwrap
+
+import pytest
+
+from common.protocol import proto_gen as proto_gen_module
+from common.protocol.proto_gen import PythonClassParser, FieldInfo
+from common.protocol.generator.proto_gen import _PARALLEL_MIN_FILES
+
+SOURCE = textwrap.dedent('''
+    from common.protocol.core.base_request import BaseRequest
+    from common.protocol.core.decorators import message
+
+    @message(9001)
+    class DemoRequest(BaseRequest):
+        """示例请求"""
+
+        level: int = 1
+
+        def __init__(self):
+            super().__init__()
+            self.name: str = ""
+            self.tags: List[str] = []
+            self.x = self.y = 0
+            self.player_id: str = ""
+            self._hidden: int = 0
+
+        def helper(self):
+            class Inner(BaseRequest):
+                pass
+
+    class Plain:
+        value: int = 0
+
+    if True:
+        class Wrapped(BaseRequest):
+            flag: bool = False
+''')
+
+def _write(tmp_path, name, content):
+    """写入测试源文件"""
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+def test_parse_file_collects_message_classes(tmp_path):
+    """类体和__init__中的字段按源码顺序生成，跳过保留字段和私有字段"""
+    messages = PythonClassParser().parse_file(_write(tmp_path, "demo.py", SOURCE))
+    
+    assert [m.name for m in messages] == ["DemoRequest", "Wrapped"]
+    demo = messages[0]
+    assert demo.comment == "示例请求"
+    assert demo.fields[:4] == [
+        FieldInfo("sequence", "string", 1),
+        FieldInfo("timestamp", "int64", 2),
+        FieldInfo("player_id", "string", 3),
+        FieldInfo("metadata", "map<string, string>", 4),
+    ]
+    assert demo.fields[4:] == [
+        FieldInfo("level", "int32", 5),
+        FieldInfo("name", "string", 6),
+        FieldInfo("tags", "repeated string", 7),
+        FieldInfo("x", "int32", 8),
+        FieldInfo("y", "int32", 9),
+    ]
+
+def test_parse_file_skips_files_without_markers(tmp_path):
+    """不包含消息标记的文件直接跳过"""
+    path = _write(tmp_path, "plain.py", "class message_box:\n    message: str = ''\n")
+    
+    assert PythonClassParser().parse_file(path) == []
+
+def test_parse_file_syntax_error(tmp_path):
+    """语法错误的文件返回空列表"""
+    path = _write(tmp_path, "broken.py", "@message(1)\nclass Broken(BaseRequest:\n")
+    
+    assert PythonClassParser().parse_file(path) == []
+
+def test_parse_directory_order_and_pruning(tmp_path):
+    """按文件路径顺序解析，跳过"_"开头的文件、__pycache__和隐藏目录"""
+    body = "@message(1)\nclass {0}(BaseRequest):\n    value: int = 0\n"
+    (tmp_path / "b").mkdir()
+    (tmp_path / "_internal").mkdir()
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / ".hidden").mkdir()
+    _write(tmp_path, "b/second.py", body.format("Second"))
+    _write(tmp_path, "a_first.py", body.format("First"))
+    _write(tmp_path, "_private.py", body.format("Private"))
+    _write(tmp_path, "_internal/inner.py", body.format("Inner"))
+    _write(tmp_path, "__pycache__/cached.py", body.format("Cached"))
+    _write(tmp_path, ".hidden/hidden.py", body.format("Hidden"))
+    
+    parser = PythonClassParser()
+    messages = parser.parse_directory(str(tmp_path))
+    
+    assert [m.name for m in messages] == ["Inner", "First", "Second"]
+    assert parser.messages == messages
+
+def test_parse_directory_parallel(tmp_path):
+    """文件数达到阈值时多进程解析，结果与逐个解析一致"""
+    body = "@message(1)\nclass {0}(BaseRequest):\n    value: int = 0\n    name: str = ''\n"
+    for i in range(_PARALLEL_MIN_FILES + 4):
+        _write(tmp_path, f"m{i:02d}.py", body.format(f"Message{i:02d}"))
+        
+    parser = PythonClassParser()
+    messages = parser.parse_directory(str(tmp_path))
+    
+    serial = PythonClassParser()
+    for path in sorted(tmp_path.iterdir()):
+        serial.parse_file(str(path))
+    assert messages == serial.messages
+    assert parser.messages == messages
+    assert [m.name for m in messages][:2] == ["Message00", "Message01"]
+
+def test_parse_cache(tmp_path, monkeypatch):
+    """启用缓存后内容未变化的文件不再ast.parse，内容变化后重新解析"""
+    monkeypatch.delenv("PROTO_GEN_CACHE", raising=False)
+    assert PythonClassParser().cache_dir is None
+    
+    cache_dir = tmp_path / "cache"
+    path = _write(tmp_path, "demo.py", SOURCE)
+    first = PythonClassParser(str(cache_dir)).parse_file(path)
+    assert len(list(cache_dir.glob("*.pkl"))) == 1
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected ast.parse")
+    monkeypatch.setattr(proto_gen_module.ast, "parse", fail)
+    parser = PythonClassParser(str(cache_dir))
+    assert parser.parse_file(path) == first
+    assert parser.messages == first
+    
+    _write(tmp_path, "demo.py", SOURCE + "\n# changed\n")
+    with pytest.raises(AssertionError):
+        parser.parse_file(path)
+
+def test_parse_file_skips_plain_dataclasses(tmp_path, monkeypatch):
+    """只有@dataclass的文件不会进入ast.parse"""
+    path = _write(tmp_path, "plain_dc.py", "@dataclass\nclass Point:\n    x: int = 0\n")
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("unexpected ast.parse")
+    monkeypatch.setattr(proto_gen_module.ast, "parse", fail)
+    assert PythonClassParser().parse_file(path) == []
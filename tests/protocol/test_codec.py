@@ -0,0 +1,150 @@
+"""
+消息编解码测试
+作者: lx
+日期: 2025-06-18
+"""
+import os
+import struct
+
+import pytest
+
+from common.protocol.core.decorators import RAW_MESSAGE_TYPES, register_raw_message
+from common.protocol.core.message_type import MessageType
+from common.protocol.crypto import crypto_config
+from common.protocol.crypto.aes_cipher import AESCipher
+from common.protocol.crypto.chacha_cipher import ChaCha20Cipher
+from common.protocol.crypto.crypto_config import CryptoConfig
+from common.protocol.encoding.decoder import MessageDecoder, HAS_LZ4
+from common.protocol.encoding.encoder import MessageEncoder
+from common.protocol.messages.auth.login_request import LoginRequest
+from common.protocol.messages.chat.chat_request import ChatRequest
+
+# 测试用透传消息类型
+RAW_TYPE = 0xFFF0
+
+def _login(name: str = "knight") -> LoginRequest:
+    """构造登录请求"""
+    request = LoginRequest()
+    request.username = name
+    request.password = "secret"
+    request.device_id = "device-1"
+    request.platform = "ios"
+    return request
+
+def _pair(**kwargs):
+    """共用同一密钥的编码器和解码器"""
+    encoder = MessageEncoder(**kwargs)
+    decoder = MessageDecoder()
+    encoder._cipher = decoder._cipher = AESCipher(os.urandom(16))
+    return encoder, decoder
+
+def test_frame_header_layout():
+    """帧头为[4字节长度][2字节消息类型][1字节标志位]"""
+    frame = MessageEncoder().encode(b"payload", MessageType.LOGIN_REQUEST)
+    
+    assert struct.unpack_from("!IHB", frame) == (7, MessageType.LOGIN_REQUEST, 0)
+    assert frame[7:] == b"payload"
+
+def test_round_trip():
+    """编码后解码得到相同的字段"""
+    encoder, decoder = _pair()
+    request = _login()
+    decoder.feed(encoder.encode(request))
+    
+    decoded = decoder.decode()
+    assert isinstance(decoded, LoginRequest)
+    assert decoded.to_dict() == request.to_dict()
+    assert decoder.decode() is None
+
+@pytest.mark.skipif(not HAS_LZ4, reason="lz4 not installed")
+def test_round_trip_compressed_and_encrypted():
+    """压缩和加密的帧设置对应标志位并能还原"""
+    encoder, decoder = _pair(use_compression=True, use_encryption=True, compression_threshold=16)
+    request = _login("k" * 512)
+    frame = encoder.encode(request)
+    
+    assert frame[6] == 0x03
+    decoder.feed(frame)
+    assert decoder.decode().username == "k" * 512
+
+def test_partial_feeds():
+    """逐字节输入，帧完整后才解出消息"""
+    encoder, decoder = _pair()
+    frames = encoder.encode(_login("a")) + encoder.encode(_login("b"))
+    
+    decoded = []
+    for i in range(len(frames)):
+        decoder.feed(frames[i:i + 1])
+        decoded.extend(decoder.decode_all())
+    assert [m.username for m in decoded] == ["a", "b"]
+
+def test_next_frame_rewinds_when_drained():
+    """数据全部消费后读写位置回到缓冲区开头"""
+    decoder = MessageDecoder(buffer_size=16)
+    encoder = MessageEncoder()
+    first = encoder.encode(b"x" * 10, RAW_TYPE)
+    second = encoder.encode(b"y" * 30, RAW_TYPE)
+    decoder.feed(first + second[:5])
+    
+    msg_type, flags, body = decoder._next_frame()
+    assert (msg_type, flags, bytes(body)) == (RAW_TYPE, 0, b"x" * 10)
+    assert decoder._next_frame() is None
+    
+    # 剩余的半帧搬到开头，缓冲区按需扩容
+    decoder.feed(second[5:])
+    msg_type, _, body = decoder._next_frame()
+    assert bytes(body) == b"y" * 30
+    assert (decoder._buffer_pos, decoder._buffer_end) == (0, 0)
+
+def test_raw_message_passthrough():
+    """透传消息返回(消息类型, 消息体)"""
+    register_raw_message(RAW_TYPE)
+    try:
+        encoder, decoder = _pair()
+        decoder.feed(encoder.encode(b"\x01\x02\x03", RAW_TYPE))
+        assert decoder.decode() == (RAW_TYPE, b"\x01\x02\x03")
+    finally:
+        RAW_MESSAGE_TYPES.discard(RAW_TYPE)
+
+def test_encode_batch_matches_encode():
+    """批量编码与逐条编码的字节一致"""
+    encoder = MessageEncoder()
+    messages = [b"first", b"second-frame", b""]
+    
+    assert encoder.encode_batch(messages) == b"".join(encoder.encode(m) for m in messages)
+
+def test_encode_into():
+    """直接写入调用方缓冲区，空间不足时抛ValueError"""
+    encoder = MessageEncoder()
+    buffer = bytearray(32)
+    
+    written = encoder.encode_into(buffer, 4, b"abc", RAW_TYPE)
+    assert written == 10
+    assert bytes(buffer[4:14]) == encoder.encode(b"abc", RAW_TYPE)
+    with pytest.raises(ValueError):
+        encoder.encode_into(buffer, 30, b"abc", RAW_TYPE)
+
+def test_encode_batch_views():
+    """每一帧的视图都指向同一块连续缓冲区"""
+    encoder, decoder = _pair()
+    chat = ChatRequest()
+    chat.content = "hello"
+    out, views = encoder.encode_batch_views([_login(), chat])
+    
+    assert b"".join(bytes(v) for v in views) == bytes(out)
+    assert all(v.obj is out for v in views)
+    decoder.feed(bytes(views[1]))
+    assert decoder.decode().content == "hello"
+
+@pytest.mark.parametrize("aes_accelerated", [True, False])
+def test_cipher_pinned_by_config(monkeypatch, aes_accelerated):
+    """加密算法由配置固定，与本机是否支持AES硬件加速无关"""
+    monkeypatch.setattr(crypto_config, "has_aes_acceleration", lambda: aes_accelerated)
+    encoder = MessageEncoder(use_encryption=True)
+    decoder = MessageDecoder()
+    encoder.encode(b"x", RAW_TYPE)
+    
+    assert type(encoder._cipher) is AESCipher
+    chacha = CryptoConfig(algorithm="CHACHA20-POLY1305", key_size=32)
+    assert type(MessageEncoder(crypto_config=chacha)._crypto_config.create_cipher()) is ChaCha20Cipher
+    assert decoder._crypto_config.algorithm == encoder._crypto_config.algorithm
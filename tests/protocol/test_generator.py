@@ -0,0 +1,168 @@
+"""
+ProtoGenerator测试
+作者: lx
+日期: 2025-06-18
+"""
+import importlib.util
+import pickle
+import shutil
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from common.protocol.generator import ProtoGenerator, compile_all, proto_gen
+
+# 消息名在默认描述符池中全局唯一，各测试使用不同的前缀
+SOURCE = '''
+from common.protocol.core.base_request import BaseRequest
+from common.protocol.core.base_response import BaseResponse
+from common.protocol.core.decorators import message
+
+@message(9101)
+class {prefix}Request(BaseRequest):
+    """请求"""
+    name: str = ""
+    level: int = 1
+    tags: List[str] = []
+    metadata: Dict[str, Any] = {{}}
+
+@message(-9101)
+class {prefix}Response(BaseResponse):
+    """响应"""
+    ok: bool = False
+'''
+
+def _write_messages(directory: Path, prefix: str) -> Path:
+    """写入测试消息源文件"""
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{prefix.lower()}.py").write_text(SOURCE.format(prefix=prefix), encoding="utf-8")
+    return directory
+
+def _load_module(path: str):
+    """按文件路径导入生成的模块"""
+    spec = importlib.util.spec_from_file_location(Path(path).stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_emit_python(tmp_path):
+    """emit_python生成的模块与proto定义的字段一致，无需protoc"""
+    message_dir = _write_messages(tmp_path / "messages", "Emit")
+    generator = ProtoGenerator(str(message_dir), str(tmp_path / "emit_test.proto"))
+    generator.scan_messages()
+    module = _load_module(generator.emit_python())
+    
+    request = module.EmitRequest(name="knight", tags=["a", "b"], metadata={"k": "v"})
+    parsed = module.EmitRequest.FromString(request.SerializeToString())
+    assert parsed.name == "knight"
+    assert list(parsed.tags) == ["a", "b"]
+    assert dict(parsed.metadata) == {"k": "v"}
+    fields = [field.name for field in module.EmitRequest.DESCRIPTOR.fields]
+    assert fields == ["sequence", "timestamp", "player_id", "metadata", "name", "level", "tags"]
+    data_field = module.EmitResponse.DESCRIPTOR.fields_by_name["data"]
+    assert data_field.message_type.full_name == "google.protobuf.Any"
+
+@pytest.mark.skipif(shutil.which("protoc") is None, reason="protoc not installed")
+def test_compile_all(tmp_path):
+    """一次protoc调用编译多个proto文件"""
+    for name in ("first", "second"):
+        (tmp_path / f"{name}.proto").write_text(
+            f'syntax = "proto3";\npackage compile_test;\nmessage {name.title()} {{ int32 value = 1; }}\n',
+            encoding="utf-8")
+        
+    assert compile_all(["first.proto", "second.proto"], proto_path=str(tmp_path), output_dir=str(tmp_path))
+    assert (tmp_path / "first_pb2.py").exists()
+    assert (tmp_path / "second_pb2.py").exists()
+    assert not compile_all([str(tmp_path / "missing.proto")], proto_path=str(tmp_path), output_dir=str(tmp_path))
+
+def test_compile_all_empty():
+    """没有proto文件时不调用protoc"""
+    assert compile_all([]) is True
+
+def test_generate_matches_generate_proto(tmp_path, monkeypatch):
+    """单遍generate与scan_messages+generate_proto输出一致，消息按名称排序"""
+    monkeypatch.setattr(ProtoGenerator, "_compile_proto", lambda self, proto_files=None: None)
+    message_dir = tmp_path / "messages"
+    _write_messages(message_dir / "b", "Alpha")
+    _write_messages(message_dir / "a", "Zulu")
+    
+    single = ProtoGenerator(str(message_dir), str(tmp_path / "single.proto"))
+    single.generate(ts="fixed")
+    two_pass = ProtoGenerator(str(message_dir), str(tmp_path / "two_pass.proto"))
+    two_pass.scan_messages()
+    two_pass.generate_proto(ts="fixed")
+    
+    content = (tmp_path / "single.proto").read_text(encoding="utf-8")
+    assert content == (tmp_path / "two_pass.proto").read_text(encoding="utf-8")
+    names = [line.split()[1] for line in content.splitlines() if line.startswith("message ")]
+    assert names == ["AlphaRequest", "AlphaResponse", "ZuluRequest", "ZuluResponse"]
+    assert single.message_files["ZuluRequest"].endswith("zulu.py")
+
+def test_ast_cache(tmp_path, monkeypatch):
+    """启用缓存后未变化的文件不再解析，缓存键带版本号"""
+    message_dir = _write_messages(tmp_path / "messages", "Cached")
+    cache_file = tmp_path / ".proto_gen_cache.pkl"
+    
+    first = ProtoGenerator(str(message_dir), str(tmp_path / "cached.proto"), use_cache=True)
+    first.scan_messages()
+    assert cache_file.exists()
+    with open(cache_file, "rb") as f:
+        keys = list(pickle.load(f))
+    assert [key[0] for key in keys] == [proto_gen._AST_CACHE_VERSION]
+    
+    def fail(path):
+        raise AssertionError(f"unexpected parse: {path}")
+    monkeypatch.setattr(proto_gen, "_parse_file_worker", fail)
+    second = ProtoGenerator(str(message_dir), str(tmp_path / "cached.proto"), use_cache=True)
+    second.scan_messages()
+    assert second.messages == first.messages
+    
+    # 版本变化后旧条目失效
+    monkeypatch.setattr(proto_gen, "_AST_CACHE_VERSION", proto_gen._AST_CACHE_VERSION + 1)
+    with pytest.raises(AssertionError):
+        ProtoGenerator(str(message_dir), str(tmp_path / "cached.proto"), use_cache=True).scan_messages()
+
+def test_cache_disabled_by_default(tmp_path):
+    """默认不写缓存文件"""
+    generator = ProtoGenerator(str(_write_messages(tmp_path / "messages", "NoCache")), str(tmp_path / "x.proto"))
+    generator.scan_messages()
+    
+    assert not (tmp_path / ".proto_gen_cache.pkl").exists()
+
+def test_parse_nested_message_classes(tmp_path):
+    """循环、函数体、match、async with和except*中的消息类都能找到"""
+    path = tmp_path / "nested.py"
+    path.write_text(textwrap.dedent('''
+        for _ in range(1):
+            @message(1)
+            class InFor(BaseRequest):
+                value: int = 0
+
+        def factory():
+            @message(2)
+            class InFunc(BaseRequest):
+                value: int = 0
+
+        async def handler():
+            async with lock:
+                @message(3)
+                class InAsyncWith(BaseRequest):
+                    value: int = 0
+
+        match kind:
+            case 1:
+                @message(4)
+                class InMatch(BaseRequest):
+                    value: int = 0
+
+        try:
+            pass
+        except* ValueError:
+            @message(5)
+            class InTryStar(BaseRequest):
+                value: int = 0
+    '''), encoding="utf-8")
+    
+    fragment = proto_gen._parse_file_worker(str(path))
+    assert list(fragment) == ["InFor", "InFunc", "InAsyncWith", "InMatch", "InTryStar"]
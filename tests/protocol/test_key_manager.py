@@ -0,0 +1,29 @@
+"""
+密钥管理器测试
+作者: lx
+日期: 2025-06-18
+"""
+import hashlib
+
+from common.protocol.crypto import key_manager
+from common.protocol.crypto.key_manager import KeyManager
+
+def test_derive_key_cache():
+    """派生结果与PBKDF2一致，缓存键不含明文密码，可清空"""
+    manager = KeyManager()
+    key = manager.derive_key(b"secret", b"salt", "k1", iterations=1000)
+    
+    assert key == hashlib.pbkdf2_hmac("sha256", b"secret", b"salt", 1000, 16)
+    assert manager.derive_key(b"secret", b"salt", "k2", iterations=1000) is key
+    assert all(b"secret" not in cache_key for cache_key in manager._derived)
+    manager.clear_cache()
+    assert manager._derived == {}
+
+def test_derive_cache_bounded(monkeypatch):
+    """缓存条目数超出上限时淘汰最早的条目"""
+    monkeypatch.setattr(key_manager, "_DERIVE_CACHE_SIZE", 2)
+    manager = KeyManager()
+    derived = manager.derive_keys(b"secret", {f"k{i}": bytes([i]) for i in range(5)}, iterations=1000)
+    
+    assert len(derived) == 5
+    assert len(manager._derived) == 2
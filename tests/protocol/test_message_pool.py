@@ -0,0 +1,38 @@
+"""
+对象池测试
+作者: lx
+日期: 2025-06-18
+"""
+from common.protocol.encoding.message_pool import BufferPool
+
+def test_buffer_pool_reuse():
+    """归还的缓冲区被同一桶的请求复用，长度为桶大小"""
+    pool = BufferPool(initial_size=1024)
+    buffer = pool.get(1500)
+    
+    assert len(buffer) == 2048
+    pool.put(buffer)
+    assert pool.get(1025) is buffer
+    assert pool.size() == 0
+
+def test_buffer_pool_rounds_initial_size():
+    """initial_size不是2的幂时向上取整，归还的缓冲区能被取回"""
+    pool = BufferPool(initial_size=1000)
+    buffer = pool.get()
+    
+    assert pool.initial_size == len(buffer) == 1024
+    pool.put(buffer)
+    assert pool.get() is buffer
+
+def test_buffer_pool_drops_odd_sizes():
+    """长度不是桶大小或小于initial_size的缓冲区不入池"""
+    pool = BufferPool(initial_size=1024, max_size=1)
+    pool.put(bytearray(1000))
+    pool.put(bytearray(1500))
+    pool.put(bytearray(512))
+    pool.put(b"\x00" * 1024)
+    assert pool.size() == 0
+    
+    pool.put(bytearray(1024))
+    pool.put(bytearray(1024))
+    assert pool.size() == 1
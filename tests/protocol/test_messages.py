@@ -0,0 +1,39 @@
+"""
+消息包按需导入测试
+作者: lx
+日期: 2025-06-18
+"""
+import subprocess
+import sys
+import textwrap
+
+def _run(code: str) -> str:
+    """在新进程中执行，避免受其他测试已导入的消息类影响"""
+    result = subprocess.run([sys.executable, "-c", textwrap.dedent(code)],
+                            capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+def test_import_does_not_register():
+    """导入消息包和解码器模块都不注册消息，创建解码器时才注册"""
+    output = _run('''
+        from common.protocol import MESSAGE_REGISTRY
+        import common.protocol.messages
+        import common.protocol.encoding.decoder as decoder
+        print(len(MESSAGE_REGISTRY))
+        decoder.MessageDecoder()
+        print(len(MESSAGE_REGISTRY))
+    ''')
+    
+    assert output[0] == "0"
+    assert int(output[1]) > 0
+
+def test_scanner_loads_messages():
+    """MessageScanner读取注册表前完成注册"""
+    output = _run('''
+        from common.protocol import MessageType
+        from common.protocol.generator import MessageScanner
+        info = MessageScanner([]).get_message_info(MessageType.LOGIN_REQUEST)
+        print(info["name"])
+    ''')
+    
+    assert output == ["LoginRequest"]
@@ -0,0 +1,36 @@
+"""
+随机nonce生成测试
+作者: lx
+日期: 2025-06-18
+"""
+import os
+
+import pytest
+
+from common.protocol.crypto import nonce
+from common.protocol.crypto.nonce import NONCE_SIZE, random_nonce
+
+def test_random_nonce_unique():
+    """跨越多批生成的nonce长度正确且互不相同"""
+    values = [random_nonce() for _ in range(nonce._BATCH * 3 + 1)]
+    
+    assert all(len(value) == NONCE_SIZE for value in values)
+    assert len(set(values)) == len(values)
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_fork_discards_inherited_pool():
+    """fork后子进程清空继承的nonce，不会与父进程重复"""
+    random_nonce()  # 确保池中有剩余
+    assert nonce._pool
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        os.write(write_fd, b"1" if not nonce._pool else b"0")
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as f:
+        result = f.read()
+    os.waitpid(pid, 0)
+    
+    assert result == b"1"
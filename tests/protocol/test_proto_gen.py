@@ -0,0 +1,58 @@
+"""
+Proto生成器测试
+作者: lx
+日期: 2025-06-18
+"""
+import re
+import shutil
+from pathlib import Path
+
+import pytest
+
+from common.protocol.proto_gen import AutoProtoGenerator
+from common.protocol.messages.auth import login_request, login_response, logout_request
+from common.protocol.messages.chat import chat_request, chat_response
+from common.protocol.messages.player import player_info_request, player_info_response
+
+MESSAGES_DIR = Path(__file__).resolve().parents[2] / "common" / "protocol" / "messages"
+
+# 按文件路径顺序排列，与generate_from_directory的输出顺序一致
+MESSAGE_MODULES = [
+    login_request, login_response, logout_request,
+    chat_request, chat_response,
+    player_info_request, player_info_response,
+]
+
+def _strip_timestamp(content: str) -> str:
+    """去掉生成时间行"""
+    return re.sub(r"// 生成时间.*", "", content)
+
+def test_generate_from_classes_matches_directory(tmp_path):
+    """从已导入的类生成与从源码目录生成的proto一致"""
+    generator = AutoProtoGenerator(output_dir=str(tmp_path))
+    from_dir = generator.generate_from_directory(str(MESSAGES_DIR), "dir.proto", compile_proto=False)
+    from_classes = generator.generate_from_classes(MESSAGE_MODULES, "classes.proto", compile_proto=False)
+    
+    assert _strip_timestamp(from_dir.read_text(encoding="utf-8")) == \
+        _strip_timestamp(from_classes.read_text(encoding="utf-8"))
+
+def test_generate_from_classes_includes_init_fields(tmp_path):
+    """__init__中声明的字段也会生成"""
+    generator = AutoProtoGenerator(output_dir=str(tmp_path))
+    proto_file = generator.generate_from_classes([login_request], "login.proto", compile_proto=False)
+    content = proto_file.read_text(encoding="utf-8")
+    
+    assert "string username = 5;" in content
+    assert "string version = 9;" in content
+
+def test_compile_many_single_protoc_call(tmp_path):
+    """多个proto文件一次编译，输出到output_dir"""
+    if shutil.which("protoc") is None:
+        pytest.skip("protoc not installed")
+    generator = AutoProtoGenerator(output_dir=str(tmp_path))
+    first = generator.generate_from_classes([login_request], "first.proto", compile_proto=False)
+    second = generator.generate_from_classes([chat_request], "second.proto", compile_proto=False)
+    
+    assert generator.compile_many([first, second])
+    assert (tmp_path / "first_pb2.py").exists()
+    assert (tmp_path / "second_pb2.py").exists()
@@ -0,0 +1,65 @@
+"""
+协议工具测试
+作者: lx
+日期: 2025-06-18
+"""
+import asyncio
+import os
+
+from common.protocol.protocol_utils import MessageBuffer, ProtocolUtils
+from common.protocol.messages.auth.login_request import LoginRequest
+
+def _login(name: str) -> LoginRequest:
+    """构造登录请求"""
+    request = LoginRequest()
+    request.username = name
+    return request
+
+def test_encode_batch_contig_round_trip():
+    """连续缓冲区中的每一帧都能单独解码"""
+    utils = ProtocolUtils(enable_encryption=True, encryption_key=os.urandom(16))
+    out, views = asyncio.run(utils.encode_batch_contig([_login("a"), _login("b")]))
+    
+    assert sum(len(v) for v in views) == len(out)
+    decoded = asyncio.run(utils.decode_batch([bytes(v) for v in views]))
+    assert [m.username for m in decoded] == ["a", "b"]
+    stats = utils.get_stats()
+    assert stats["messages_encoded"] == 2
+    assert stats["messages_decoded"] == 2
+    assert stats["bytes_encoded"] == len(out)
+
+def test_message_buffer_compact():
+    """已读部分不到容量1/4时不搬移，超过后原地搬移未读数据"""
+    buffer = MessageBuffer(initial_size=64)
+    buffer.write(b"a" * 40)
+    
+    buffer.read(8)
+    buffer.compact()
+    assert (buffer.read_pos, buffer.write_pos) == (8, 40)
+    
+    buffer.read(12)
+    buffer.compact()
+    assert (buffer.read_pos, buffer.write_pos) == (0, 20)
+    assert bytes(buffer.peek(20)) == b"a" * 20
+
+def test_message_buffer_compact_drained():
+    """数据全部读完时直接回到开头"""
+    buffer = MessageBuffer(initial_size=64)
+    buffer.write(b"abcd")
+    buffer.read(4)
+    buffer.compact()
+    
+    assert (buffer.read_pos, buffer.write_pos) == (0, 0)
+    buffer.write(b"xyz")
+    assert bytes(buffer.read(3)) == b"xyz"
+    assert buffer.read(1) is None
+
+def test_message_buffer_grows():
+    """写入超过容量时扩容并保留已写入的数据"""
+    buffer = MessageBuffer(initial_size=4)
+    buffer.write(b"abc")
+    buffer.write(memoryview(b"defgh"))
+    
+    assert len(buffer.buffer) >= 8
+    assert bytes(buffer.read(8)) == b"abcdefgh"
+    assert buffer.remaining() == 0
@@ -0,0 +1,39 @@
+"""
+序列化工具测试
+作者: lx
+日期: 2025-06-18
+"""
+import json
+import math
+
+from common.protocol.utils.serializer import (
+    serialize_json, deserialize_json, serialize_msgpack, deserialize_msgpack
+)
+
+def test_json_round_trip():
+    """非ASCII字符原样输出，整数键转为字符串"""
+    data = {"name": "骑士", "items": [1, 2, 3], 7: True}
+    encoded = serialize_json(data)
+    
+    assert "骑士".encode("utf-8") in encoded
+    assert deserialize_json(encoded) == {"name": "骑士", "items": [1, 2, 3], "7": True}
+
+def test_json_big_int_falls_back_to_stdlib():
+    """超过64位的整数回退到json.dumps/json.loads"""
+    data = {"id": 2 ** 70}
+    encoded = serialize_json(data)
+    
+    assert encoded == json.dumps(data, ensure_ascii=False).encode("utf-8")
+    assert deserialize_json(encoded) == data
+
+def test_json_nan_input():
+    """标准库写出的NaN可以读回"""
+    value = deserialize_json(b'{"x": NaN}')["x"]
+    
+    assert math.isnan(value)
+
+def test_msgpack_round_trip():
+    """msgpack往返一致"""
+    data = {"a": 1, "b": [b"raw", "text", None]}
+    
+    assert deserialize_msgpack(serialize_msgpack(data)) == data
@@ -0,0 +1,96 @@
+"""
+缓存装饰器测试
+作者: lx
+日期: 2025-06-20
+"""
+import asyncio
+import threading
+import time
+
+from common.utils import cache
+
+def test_cache_hit():
+    """相同参数只执行一次"""
+    calls = []
+    
+    @cache()
+    def square(x):
+        calls.append(x)
+        return x * x
+    
+    assert square(3) == 9
+    assert square(3) == 9
+    assert square(x=3) == 9
+    assert calls == [3, 3]
+
+def test_cache_lru_eviction():
+    """超出maxsize时淘汰最久未使用的条目"""
+    calls = []
+    
+    @cache(maxsize=2)
+    def ident(x):
+        calls.append(x)
+        return x
+    
+    ident(1)
+    ident(2)
+    ident(1)  # 1变为最近使用
+    ident(3)  # 淘汰2
+    ident(1)
+    ident(2)
+    assert calls == [1, 2, 3, 2]
+
+def test_cache_ttl(monkeypatch):
+    """过期条目重新计算"""
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    calls = []
+    
+    @cache(ttl=5)
+    def ident(x):
+        calls.append(x)
+        return x
+    
+    ident(1)
+    now[0] += 4.9
+    ident(1)
+    now[0] += 0.2
+    ident(1)
+    assert calls == [1, 1]
+
+def test_cache_async():
+    """异步函数缓存结果而不是协程"""
+    calls = []
+    
+    @cache()
+    async def double(x):
+        calls.append(x)
+        return x * 2
+    
+    async def run():
+        return [await double(2), await double(2)]
+    
+    assert asyncio.run(run()) == [4, 4]
+    assert calls == [2]
+
+def test_cache_concurrent_eviction():
+    """多线程同时读写并淘汰，不抛异常"""
+    @cache(maxsize=4)
+    def ident(x):
+        return x
+    
+    errors = []
+    
+    def worker(offset):
+        try:
+            for i in range(20000):
+                assert ident((i + offset) % 8) == (i + offset) % 8
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
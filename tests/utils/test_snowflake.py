@@ -0,0 +1,46 @@
+"""
+雪花算法ID生成器测试
+作者: lx
+日期: 2025-06-18
+"""
+import time
+
+import pytest
+
+from common.utils import SnowflakeIdGenerator, ParsedId, parse_id
+
+def test_parse_id_round_trip():
+    """解析结果与生成参数一致"""
+    generator = SnowflakeIdGenerator(datacenter_id=3, worker_id=17)
+    before = time.time_ns() // 1_000_000
+    snowflake_id = generator.generate_id()
+    after = time.time_ns() // 1_000_000
+    
+    parsed = generator.parse_id(snowflake_id)
+    assert isinstance(parsed, ParsedId)
+    assert parsed.datacenter_id == 3
+    assert parsed.worker_id == 17
+    assert parsed.sequence == 0
+    assert before <= parsed.timestamp <= after
+    assert parse_id(snowflake_id) == parsed
+
+def test_parsed_id_dict_access():
+    """兼容按字典键读取"""
+    parsed = parse_id(SnowflakeIdGenerator(1, 2).generate_id())
+    
+    assert parsed["worker_id"] == 2
+    assert parsed["datetime"] == parsed.datetime
+
+def test_ids_unique_and_increasing():
+    """同一生成器的ID严格递增，序列号用完后等待下一毫秒"""
+    generator = SnowflakeIdGenerator()
+    ids = [generator.generate_id() for _ in range(10000)]
+    
+    assert ids == sorted(set(ids))
+
+def test_invalid_machine_id():
+    """机器ID超出范围"""
+    with pytest.raises(ValueError):
+        SnowflakeIdGenerator(datacenter_id=32)
+    with pytest.raises(ValueError):
+        SnowflakeIdGenerator(worker_id=-1)
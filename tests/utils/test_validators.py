@@ -0,0 +1,60 @@
+"""
+统一验证工具测试
+作者: lx
+日期: 2025-06-20
+"""
+import re
+
+import pytest
+
+from common.utils import validate_data, validate_batch, Validator, ValidationError
+
+RULES = {
+    "email": [Validator.required, Validator.email_format],
+    "player_id": [Validator.player_id_format],
+}
+
+RECORDS = [
+    {"email": "a@example.com", "player_id": "player_0000000001"},
+    {"email": "", "player_id": "player_0000000002"},
+    {"email": "b@example.com", "player_id": "player_1"},
+    {"player_id": "player_0000000003"},
+    {"email": "not-an-email", "player_id": None},
+]
+
+def _passes(record):
+    """逐条用validate_data验证"""
+    try:
+        validate_data(record, RULES)
+    except ValidationError:
+        return False
+    return True
+
+def test_validate_batch_matches_validate_data():
+    """批量验证的失败下标与逐条验证一致"""
+    expected = [index for index, record in enumerate(RECORDS) if not _passes(record)]
+    
+    assert validate_batch(RECORDS, RULES) == expected == [1, 2, 3, 4]
+
+def test_validate_batch_empty():
+    """没有记录或没有规则时全部通过"""
+    assert validate_batch([], RULES) == []
+    assert validate_batch(RECORDS, {}) == []
+
+def test_validate_batch_validator_called_once_per_failure():
+    """记录失败后不再对其调用后续验证函数"""
+    calls = []
+    
+    def counting(value, field_name):
+        calls.append(value)
+        
+    rules = {"email": [Validator.required, counting]}
+    assert validate_batch(RECORDS, rules) == [1, 3]
+    assert calls == ["a@example.com", "b@example.com", "not-an-email"]
+
+def test_pattern_match_accepts_compiled_and_string():
+    """正则可以传字符串或已编译对象"""
+    assert Validator.pattern_match("abc", r"^a")
+    assert Validator.pattern_match("abc", re.compile(r"^a"))
+    with pytest.raises(ValidationError):
+        Validator.pattern_match("xbc", r"^a")